@@ -0,0 +1,138 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by sender or source IP.
+
+    State per key is a single (tokens, last_update) tuple. A bucket that has
+    refilled completely is indistinguishable from a new one, so idle keys are
+    swept out periodically and memory tracks only recently active clients.
+    """
+
+    def __init__(self, rate, burst, max_keys=100_000, sweep_interval=30, clock=time.monotonic):
+        self.rate = rate  # Tokens per second
+        self.burst = burst
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.last_sweep = clock()
+
+    def _tokens(self, key, now):
+        tokens, last = self.buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - last) * self.rate)
+
+    def _sweep(self, now):
+        full_after = self.burst / self.rate
+        self.buckets = {k: v for k, v in self.buckets.items() if now - v[1] < full_after}
+        # Still too many active keys: forget the oldest, they fall back to a full bucket
+        while len(self.buckets) > self.max_keys:
+            del self.buckets[next(iter(self.buckets))]
+        self.last_sweep = now
+
+    def check(self, key, cost=1):
+        """Return seconds to wait before key can spend cost tokens (0 if it can now)."""
+        with self.lock:
+            tokens = self._tokens(key, self.clock())
+        return 0 if tokens >= cost else (cost - tokens) / self.rate
+
+    def consume(self, key, cost=1):
+        """Spend cost tokens; return 0 on success or the seconds to wait."""
+        with self.lock:
+            now = self.clock()
+            if now - self.last_sweep >= self.sweep_interval or len(self.buckets) > self.max_keys:
+                self._sweep(now)
+            tokens = self._tokens(key, now)
+            if tokens < cost:
+                self.buckets[key] = (tokens, now)
+                return (cost - tokens) / self.rate
+            self.buckets[key] = (tokens - cost, now)
+            return 0
+
+    def __len__(self):
+        return len(self.buckets)
+
+
+class AdmissionController:
+    """
+    Front door for transaction ingress.
+
+    Requests are rejected as cheaply as possible, in order:
+      1. 503 when the node is saturated (mempool depth or signature
+         verification backlog over their limits),
+      2. 429 when the source IP is over its token bucket,
+      3. 429 when the sender's token bucket is empty. Buckets are keyed by
+         the address bound to the signing key, and only charged after the
+         signature verifies, so a forged request cannot drain someone
+         else's budget.
+    Each rejection carries a Retry-After in seconds.
+    """
+
+    def __init__(self, pending_depth, ip_rate=20, ip_burst=40, sender_rate=5, sender_burst=20,
+                 max_mempool=50_000, max_verify_backlog=64, shed_retry_after=10):
+        self.pending_depth = pending_depth
+        self.ip_limiter = TokenBucketLimiter(ip_rate, ip_burst)
+        self.sender_limiter = TokenBucketLimiter(sender_rate, sender_burst)
+        self.max_mempool = max_mempool
+        self.max_verify_backlog = max_verify_backlog
+        self.shed_retry_after = shed_retry_after
+        self.verify_backlog = 0
+        self.lock = threading.Lock()
+        self.rejected = {'shed': 0, 'ip': 0, 'sender': 0}
+
+    def _reject(self, reason, status, message, retry_after):
+        self.rejected[reason] += 1
+        return status, message, max(1, math.ceil(retry_after))
+
+    def admit_request(self, ip):
+        """Checks that need nothing but the connection. Returns None or (status, message, retry_after)."""
+        if self.pending_depth() >= self.max_mempool:
+            return self._reject('shed', 503, "Mempool is full", self.shed_retry_after)
+        if self.verify_backlog >= self.max_verify_backlog:
+            return self._reject('shed', 503, "Node is busy verifying signatures", self.shed_retry_after)
+
+        wait = self.ip_limiter.consume(ip)
+        if wait:
+            return self._reject('ip', 429, "Too many requests from this address", wait)
+        return None
+
+    def admit_sender(self, sender):
+        """Pre-verification check: reject a sender whose bucket is already empty."""
+        wait = self.sender_limiter.check(sender)
+        if wait:
+            return self._reject('sender', 429, "Too many transactions from this sender", wait)
+        return None
+
+    def charge_sender(self, sender):
+        """
+        Charge a sender once its signature has been verified. Rejects when
+        concurrent requests emptied the bucket after admit_sender passed.
+        """
+        wait = self.sender_limiter.consume(sender)
+        if wait:
+            return self._reject('sender', 429, "Too many transactions from this sender", wait)
+        return None
+
+    @contextmanager
+    def verifying(self):
+        with self.lock:
+            self.verify_backlog += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.verify_backlog -= 1
+
+    def stats(self):
+        return {
+            'mempool_depth': self.pending_depth(),
+            'verify_backlog': self.verify_backlog,
+            'tracked_ips': len(self.ip_limiter),
+            'tracked_senders': len(self.sender_limiter),
+            'rejected': dict(self.rejected)
+        }
@@ -1,25 +1,44 @@
-from flask import Flask, request, jsonify
-from blockchain import Blockchain
-from wallet import Wallet, verify_signature
+from flask import Flask, request, jsonify, Response
+from blockchain import Blockchain, Block
+from block_tree import EXTENDED, REORG, SIDE, ORPHAN, KNOWN
+from wallet import WalletUtils, verify_signature
 from reward_backend import RewardSystem
 from validator import (
     add_validator,
     is_validator,
-    get_current_validator_id
+    get_current_validator_id,
+    get_validator_stake
 )
 from monitor_validators import remove_unresponsive_validators
-from consensus import Consensus
+from consensus import Consensus, start_auto_consensus
 import token_factory  # Your token creation/minting logic
 import threading
 import time
+import json
+import math
+import requests
 from utils import generate_txid, current_time
+from response_cache import ResponseCache
+from keypool import KeyPairPool
+from compact_block import CompactBlockRelay
+from replay_guard import RotatingBloomFilter, payload_hash
+from admission import AdmissionController
+from chain_columns import ChainExporter, ColumnarChain
+from settlement import transfer_ref
 
 
 
 app = Flask(__name__)
 
+# Chain storage: "full", "pruned" (drop old block bodies) or "archival" (old blocks on disk)
+CHAIN_MODE = "full"
+KEEP_RECENT_BLOCKS = 1000
+CHAIN_ARCHIVE_DIR = "chain_archive"
+
 # Initialize core components
-blockchain = Blockchain()
+# Fork choice weighs each block by its validator's registered stake
+blockchain = Blockchain(mode=CHAIN_MODE, keep_blocks=KEEP_RECENT_BLOCKS, archive_dir=CHAIN_ARCHIVE_DIR,
+                        stake_of=get_validator_stake)
 consensus = Consensus(blockchain)
 rewards = RewardSystem()
 
@@ -31,7 +50,64 @@ REFERRAL_COMMISSION_RATE = 0.02
 # Wallet/referral tracking
 wallets = {}
 referrals = {}
-referral_rewards = {}
+
+# Pre-generated key pairs for wallet creation (started in __main__)
+key_pool = KeyPairPool(capacity=1000, batch_size=50, workers=2)
+MAX_BULK_WALLETS = 500
+
+# Recently seen signed payloads, checked before any signature verification
+replay_filter = RotatingBloomFilter(capacity=1_000_000, error_rate=0.001, window=600)
+
+# Ingress admission control: per-IP / per-sender token buckets and load shedding
+MAX_TX_BODY_BYTES = 16 * 1024
+TX_INGRESS_ENDPOINTS = {'submit_tx', 'transfer'}
+admission = AdmissionController(
+    pending_depth=lambda: len(blockchain.pending_transactions) + len(blockchain.current_transactions),
+    ip_rate=20, ip_burst=40,
+    sender_rate=5, sender_burst=20,
+    max_mempool=50_000,
+    max_verify_backlog=64
+)
+
+# Columnar export of finalized transactions for analytics (exported once irreversible)
+ANALYTICS_DIR = "chain_columns"
+chain_exporter = ChainExporter(ANALYTICS_DIR, confirmations=blockchain.tree.max_reorg_depth)
+chain_analytics = ColumnarChain(ANALYTICS_DIR)
+
+# Compact block relay state (recently sent blocks, partially rebuilt blocks)
+block_relay = CompactBlockRelay(max_blocks=64)
+
+# Serialized responses for read-heavy endpoints, tagged with state versions
+response_cache = ResponseCache(max_entries=4096)
+
+
+def cached_json(endpoint, args, version, build):
+    """
+    Serve a JSON response from the cache when its state version still matches.
+    build() returns (payload, status); only 200 responses are cached.
+    Honours If-None-Match so polling clients get a 304 when nothing changed.
+    """
+    cached = response_cache.get(endpoint, args, version)
+    if cached is None:
+        payload, status = build()
+        body = json.dumps(payload).encode()
+        if status != 200:
+            return Response(body, status=status, mimetype='application/json')
+        etag = response_cache.put(endpoint, args, version, body)
+    else:
+        body, etag = cached
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, status=200, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def chain_version():
+    return f"{len(blockchain.chain)}.{blockchain.state_version}"
 
 
 
@@ -47,26 +123,86 @@ threading.Thread(target=background_consensus_runner, daemon=True).start()
 
 pending_transactions = []
 
+
+def throttled(rejection):
+    status, message, retry_after = rejection
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+@app.before_request
+def admit_transaction_ingress():
+    """Reject floods before the body is parsed or any signature is checked."""
+    if request.endpoint not in TX_INGRESS_ENDPOINTS:
+        return None
+    if request.content_length is not None and request.content_length > MAX_TX_BODY_BYTES:
+        return jsonify({"error": "Request body too large"}), 413
+    rejection = admission.admit_request(request.remote_addr)
+    if rejection:
+        return throttled(rejection)
+    return None
+
+
 @app.route('/submit_tx', methods=['POST'])
 def submit_tx():
     data = request.get_json()
 
     # Validate required fields
-    required = ['sender', 'receiver', 'amount', 'signature', 'public_key']
+    required = ['sender', 'receiver', 'amount', 'nonce', 'signature', 'public_key']
     if not all(k in data for k in required):
         return jsonify({"status": "error", "message": "Missing transaction fields"}), 400
-
-    # Signature verification
-    if not verify_signature(data["public_key"], f"{data['sender']}-{data['receiver']}-{data['amount']}", data["signature"]):
-        return jsonify({"status": "error", "message": "Invalid signature"}), 400
+    if not valid_nonce(data["nonce"]):
+        return jsonify({"status": "error", "message": "Nonce must be a positive integer"}), 400
+    if not valid_amount(data["amount"]):
+        return jsonify({"status": "error", "message": "Amount must be a positive number"}), 400
+    # Optional ZINC fee for the validator; it orders the block template and is signed
+    fee = data.get("fee", 0)
+    if not valid_fee(fee):
+        return jsonify({"status": "error", "message": "Fee must be a non-negative number"}), 400
+    signed = required + ["fee"] if "fee" in data else required
+
+    # Rate limits apply to the account the key controls, whichever form sender uses
+    account = sender_account(data["sender"], data["public_key"])
+    if account is None:
+        return jsonify({"status": "error", "message": "Sender does not match public key"}), 400
+
+    rejection = admission.admit_sender(account)
+    if rejection:
+        return throttled(rejection)
+
+    # Cheap duplicate check before paying for ECDSA
+    digest = payload_hash({k: data[k] for k in signed})
+    if replay_filter.seen(digest):
+        return jsonify({"status": "error", "message": "Duplicate transaction"}), 409
+
+    # Signature verification (the nonce, and the fee when given, are part of the signed message)
+    message = f"{data['sender']}-{data['receiver']}-{data['amount']}-{data['nonce']}"
+    if "fee" in data:
+        message += f"-{fee}"
+    with admission.verifying():
+        if not verify_signature(data["public_key"], message, data["signature"]):
+            return jsonify({"status": "error", "message": "Invalid signature"}), 400
+
+    rejection = admission.charge_sender(account)
+    if rejection:
+        return throttled(rejection)
+
+    if not blockchain.reserve_nonce(data["sender"], data["nonce"]):
+        return jsonify({"status": "error", "message": f"Nonce must be greater than {blockchain.get_nonce(data['sender'])}"}), 409
+    replay_filter.add(digest)
 
     # Generate transaction
     tx = {
         "sender": data["sender"],
         "receiver": data["receiver"],
         "amount": data["amount"],
+        "nonce": data["nonce"],
         "timestamp": current_time(),
     }
+    if fee:
+        tx["fee"] = fee
     tx["txid"] = generate_txid(tx)
 
     # Add to pending tx pool
@@ -75,6 +211,33 @@ def submit_tx():
 
     return jsonify({"status": "success", "txid": tx["txid"]}), 200
 
+def sender_account(sender, public_key):
+    """Address of public_key if sender names it (as the key or the address), else None."""
+    try:
+        address = WalletUtils.get_address_from_pubkey(public_key)
+    except (TypeError, ValueError):
+        return None
+    return address if sender in (public_key, address) else None
+
+
+def valid_nonce(nonce):
+    return isinstance(nonce, int) and not isinstance(nonce, bool) and nonce > 0
+
+
+def valid_amount(amount):
+    return valid_fee(amount) and amount > 0
+
+
+def valid_fee(fee):
+    return (isinstance(fee, (int, float)) and not isinstance(fee, bool)
+            and math.isfinite(fee) and fee >= 0)
+
+
+@app.route('/nonce/<address>', methods=['GET'])
+def get_nonce(address):
+    last = blockchain.get_nonce(address)
+    return jsonify({'address': address, 'last_nonce': last, 'next_nonce': last + 1}), 200
+
 @app.route('/join-validator', methods=['POST'])
 def join_validator():
     data = request.json
@@ -111,8 +274,9 @@ def remove_validator():
 
 @app.route('/validators', methods=['GET'])
 def get_validators():
-    from validator import load_validators
-    return jsonify(load_validators()), 200
+    from validator import load_validators, get_registry_version
+    return cached_json('validators', (), get_registry_version(),
+                       lambda: (load_validators(), 200))
 
 
 
@@ -128,11 +292,16 @@ def receive_block():
         return jsonify({"error": "Block sender is not a registered validator."}), 403
 
     block = Block.from_dict(data)
+    return block_response(blockchain.receive_block(block))
 
-    if blockchain.add_block(block):
-        return jsonify({"message": "Block accepted."}), 201
-    else:
-        return jsonify({"error": "Invalid block."}), 400
+
+def block_response(result):
+    """Map a block tree insert result to an HTTP response."""
+    if result in (EXTENDED, REORG):
+        return jsonify({"message": "Block accepted.", "result": result}), 201
+    if result in (SIDE, ORPHAN, KNOWN):
+        return jsonify({"message": "Block stored.", "result": result}), 202
+    return jsonify({"error": "Invalid block."}), 400
 
 
 @app.route('/add_block', methods=['POST'])
@@ -147,25 +316,95 @@ def add_block():
     
     if blockchain.add_block(new_block):
         # ✅ Broadcast to all known nodes
-        for node in blockchain.nodes:
-            try:
-                url = f"{node}/receive_block"
-                requests.post(url, json=new_block.to_dict())
-            except Exception as e:
-                print(f"[WARN] Could not send block to {node}: {str(e)}")
-
+        broadcast_compact_block(new_block.to_dict())
         return jsonify({"message": "Block created and broadcasted."}), 201
     else:
         return jsonify({"error": "Failed to add block."}), 400
 
 
+def broadcast_compact_block(block):
+    """Send header + short ids; peers that miss transactions get them in one follow-up."""
+    compact = block_relay.make_compact(block)
+    for node in blockchain.nodes:
+        try:
+            response = requests.post(f"{node}/receive_compact_block", json=compact)
+            # 202 with "missing" asks for the transactions the peer lacks
+            missing = response.json().get("missing") if response.status_code == 202 else None
+            if not missing:
+                continue
+            requests.post(f"{node}/receive_block_txs", json={
+                "hash": block["hash"],
+                "validator": block["validator"],
+                "transactions": block_relay.get_transactions(block["hash"], missing)
+            })
+        except Exception as e:
+            print(f"[WARN] Could not send block to {node}: {str(e)}")
+
+
+BLOCK_HEADER_FIELDS = ('index', 'previous_hash', 'timestamp', 'validator', 'hash')
+
+
+@app.route('/receive_compact_block', methods=['POST'])
+def receive_compact_block():
+    data = request.get_json()
+
+    header = data.get("header")
+    if not isinstance(header, dict) or not all(k in header for k in BLOCK_HEADER_FIELDS):
+        return jsonify({"error": "Malformed compact block header."}), 400
+    if not is_validator(header.get("validator")):
+        return jsonify({"error": "Block sender is not a registered validator."}), 403
+
+    try:
+        block, missing = block_relay.receive(data, list(blockchain.get_pending_transactions()))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Malformed compact block: {str(e)}"}), 400
+    if block is None:
+        return jsonify({"missing": missing}), 202
+
+    return block_response(blockchain.receive_block(Block.from_dict(block)))
+
+
+@app.route('/receive_block_txs', methods=['POST'])
+def receive_block_txs():
+    data = request.get_json()
+
+    if not is_validator(data.get("validator")):
+        return jsonify({"error": "Block sender is not a registered validator."}), 403
+
+    block, missing = block_relay.fill(data.get("hash"), data.get("transactions") or {})
+    if block is None:
+        return jsonify({"error": "Block could not be reconstructed.", "missing": missing}), 400
+
+    return block_response(blockchain.receive_block(Block.from_dict(block)))
+
+
+
+
+
 
 
 
 
 
 
+@app.route('/block/<int:index>', methods=['GET'])
+def get_block(index):
+    if index < 0 or index >= len(blockchain.chain):
+        return jsonify({'error': 'Block not found'}), 404
 
+    # A reorg can replace an in-memory block, so those entries are versioned
+    # by hash; archived blocks are only decoded from disk on a cache miss
+    version = blockchain.get_block_version(index)
+    if version is None:
+        return jsonify({'error': f'Block #{index} has been pruned on this node'}), 410
+
+    def build():
+        block = blockchain.get_block(index)
+        if block is None:
+            return {'error': f'Block #{index} has been pruned on this node'}, 410
+        return block.to_dict(), 200
+
+    return cached_json('block', (index,), version, build)
 
 
 @app.route('/')
@@ -180,9 +419,27 @@ def create_wallet():
         return jsonify({'error': 'Invalid JSON format'}), 400
 
     referrer = data.get('referrer')
+    return jsonify(register_wallet(key_pool.get(), referrer)), 200
 
-    private_key, public_key = Wallet.create_wallet()
-    address = Wallet.get_address_from_pubkey(public_key)
+
+@app.route('/wallet/create_bulk', methods=['POST'])
+def create_wallets_bulk():
+    try:
+        data = request.get_json(force=True) or {}
+        count = int(data.get('count', 1))
+    except:
+        return jsonify({'error': 'Invalid JSON format'}), 400
+
+    if count < 1 or count > MAX_BULK_WALLETS:
+        return jsonify({'error': f'count must be between 1 and {MAX_BULK_WALLETS}'}), 400
+
+    referrer = data.get('referrer')
+    created = [register_wallet(pair, referrer) for pair in key_pool.get_many(count)]
+    return jsonify({'wallets': created}), 200
+
+
+def register_wallet(key_pair, referrer=None):
+    private_key, public_key, address = key_pair
 
     wallets[address] = {
         'private_key': private_key,
@@ -194,19 +451,35 @@ def create_wallet():
         wallets[address]['referrer'] = referrer
         referrals[address] = referrer
 
-    return jsonify({
+    return {
         'address': address,
         'private_key': private_key,
         'public_key': public_key,
         'referrer': wallets[address]['referrer']
+    }
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        'key_pool': key_pool.stats(),
+        'replay_filter': replay_filter.stats(),
+        'admission': admission.stats(),
+        'block_tree': blockchain.tree.stats(),
+        'settlements': blockchain.settlement_ledger.stats(),
+        'chain': blockchain.chain.stats() if blockchain.mode != "full" else {'height': len(blockchain.chain)},
+        'response_cache': response_cache.stats()
     }), 200
 
 
 @app.route('/balance/<address>', methods=['GET'])
 def get_balance(address):
-    balance = blockchain.get_balance(address)
-    ainc_balance = blockchain.get_balance_ainc(address)
-    return jsonify({'zinc_balance': balance, 'ainc_balance': ainc_balance}), 200
+    def build():
+        balance = blockchain.get_balance(address)
+        ainc_balance = blockchain.get_balance_ainc(address)
+        return {'zinc_balance': balance, 'ainc_balance': ainc_balance}, 200
+
+    return cached_json('balance', (address,), chain_version(), build)
 
 @app.route('/stake', methods=['POST'])
 def stake_and_register():
@@ -244,23 +517,48 @@ def claim_rewards():
 
 @app.route('/stake_info/<address>', methods=['GET'])
 def stake_info(address):
-    info = rewards.get_stake_info(address)
-    return jsonify(info), 200
+    return cached_json('stake_info', (address,), rewards.version,
+                       lambda: (rewards.get_stake_info(address), 200))
 
 @app.route('/transfer', methods=['POST'])
 def transfer():
     data = request.get_json()
-    required = ['sender', 'recipient', 'amount', 'signature']
+    required = ['sender', 'recipient', 'amount', 'nonce', 'signature']
     if not all(k in data for k in required):
         return jsonify({'error': 'Missing transaction fields'}), 400
+    if not valid_nonce(data['nonce']):
+        return jsonify({'error': 'Nonce must be a positive integer'}), 400
+    if not valid_amount(data['amount']):
+        return jsonify({'error': 'Amount must be a positive number'}), 400
 
+    # Only registered wallets transfer, so the bucket is keyed by an address bound to a key
     sender = data['sender']
+    sender_pubkey = wallets.get(sender, {}).get("public_key")
+    if not sender_pubkey:
+        return jsonify({'error': 'Invalid signature'}), 400
+
+    rejection = admission.admit_sender(sender)
+    if rejection:
+        return throttled(rejection)
+
+    digest = payload_hash({k: data[k] for k in required})
+    if replay_filter.seen(digest):
+        return jsonify({'error': 'Duplicate transaction'}), 409
+
     recipient = data['recipient']
     amount = float(data['amount'])
+    nonce = data['nonce']
     signature = data['signature']
 
-    sender_balance = blockchain.get_balance(sender)
-    if sender_balance < amount:
+    referrer = wallets.get(sender, {}).get('referrer')
+    commission = amount * REFERRAL_COMMISSION_RATE if referrer else 0
+
+    # Pooled transfers and fees/commissions only leave the balance at block
+    # time, so count what the sender has already committed
+    settlements = blockchain.settlement_ledger
+    sender_balance = (blockchain.get_balance(sender) - settlements.owed(sender, "ZINC")
+                      - blockchain.get_pending_spend(sender))
+    if sender_balance < amount + commission:
         return jsonify({'error': 'Insufficient Zinc balance'}), 400
 
     stake_info = rewards.get_stake_info(sender)
@@ -270,30 +568,57 @@ def transfer():
     fee_in_ainc = 0
     if not free_transfer:
         fee_in_ainc = amount * AINC_FEE_PERCENTAGE
-        ainc_balance = blockchain.get_balance_ainc(sender)
+        ainc_balance = blockchain.get_balance_ainc(sender) - settlements.owed(sender, "AINC")
         if ainc_balance < fee_in_ainc:
             return jsonify({'error': f'Insufficient AINC balance to pay fee of {fee_in_ainc}'}), 400
 
-    message = f"{sender}{recipient}{amount}"
-    sender_pubkey = wallets.get(sender, {}).get("public_key")
-    if not sender_pubkey or not verify_signature(sender_pubkey, message, signature):
-        return jsonify({'error': 'Invalid signature'}), 400
+    message = f"{sender}{recipient}{amount}{nonce}"
+    with admission.verifying():
+        if not verify_signature(sender_pubkey, message, signature):
+            return jsonify({'error': 'Invalid signature'}), 400
 
-    blockchain.add_transaction(sender, recipient, amount, signature)
+    rejection = admission.charge_sender(sender)
+    if rejection:
+        return throttled(rejection)
 
-    if fee_in_ainc > 0:
-        blockchain.add_transaction(sender, "ainc_fee_pool", fee_in_ainc, "fee_signature")
+    if not blockchain.reserve_nonce(sender, nonce):
+        return jsonify({'error': f'Nonce must be greater than {blockchain.get_nonce(sender)}'}), 409
+    replay_filter.add(digest)
 
-    referrer = wallets.get(sender, {}).get('referrer')
+    # Same path as /submit_tx: the block template picks it up for the next block
+    tx = {
+        "sender": sender,
+        "receiver": recipient,
+        "amount": amount,
+        "nonce": nonce,
+        "timestamp": current_time(),
+    }
+    if fee_in_ainc:
+        tx["ainc_fee"] = fee_in_ainc  # Ranks the tx in the template; paid through settlements
+    tx["txid"] = generate_txid(tx)
+
+    # Accrued before pooling so the template counts them against the sender;
+    # settled in the block that includes the transfer
+    ref = transfer_ref(sender, nonce)
+    settlements.accrue(sender, "ainc_fee_pool", "AINC", fee_in_ainc, "fee", ref)
     if referrer:
-        commission = amount * REFERRAL_COMMISSION_RATE
-        blockchain.add_transaction(sender, referrer, commission, "commission_signature")
-        referral_rewards[referrer] = referral_rewards.get(referrer, 0) + commission
+        settlements.accrue(sender, referrer, "ZINC", commission, "referral_commission", ref)
+    blockchain.add_pending_transaction(tx)
 
     return jsonify({
         'message': 'Transfer successful',
+        'txid': tx['txid'],
         'fee_charged_in_ainc': fee_in_ainc,
-        'commission_to_referrer': amount * REFERRAL_COMMISSION_RATE if referrer else 0
+        'commission_to_referrer': commission
+    }), 200
+
+
+@app.route('/referral_rewards/<address>', methods=['GET'])
+def get_referral_rewards(address):
+    settlements = blockchain.settlement_ledger
+    return jsonify({
+        'settled': settlements.settled_total(address, "referral_commission"),
+        'pending': settlements.pending_total(address, "referral_commission")
     }), 200
 
 # ---------------- Token Factory Routes ----------------
@@ -311,6 +636,7 @@ def create_token():
         return jsonify({'error': 'Missing required fields'}), 400
 
     token = token_factory.create_token(creator, name, symbol, decimals, supply)
+    response_cache.invalidate('token_info', (symbol.upper(),))
     return jsonify({'message': 'Token created successfully', 'token': token}), 200
 
 @app.route('/token/mint', methods=['POST'])
@@ -327,14 +653,19 @@ def mint_token():
     if not success:
         return jsonify({'error': result}), 400
 
+    response_cache.invalidate('token_info', (symbol.upper(),))
     return jsonify({'message': 'Mint successful', 'new_total_supply': result}), 200
 
 @app.route('/token/info/<symbol>', methods=['GET'])
 def token_info(symbol):
-    token = token_factory.get_token(symbol)
-    if not token:
-        return jsonify({'error': 'Token not found'}), 404
-    return jsonify(token), 200
+    def build():
+        token = token_factory.get_token(symbol)
+        if not token:
+            return {'error': 'Token not found'}, 404
+        return token, 200
+
+    # Token state has no version counter; create/mint invalidate explicitly
+    return cached_json('token_info', (symbol.upper(),), 0, build)
 
 # ------------------------------------------------------
 def run_validator_monitor(interval=600):  # check every 10 minutes
@@ -343,6 +674,44 @@ def run_validator_monitor(interval=600):  # check every 10 minutes
         remove_unresponsive_validators()
         time.sleep(interval)
 
+def run_chain_exporter(interval=30):
+    global chain_analytics
+    while True:
+        if chain_exporter.sync(blockchain):
+            chain_analytics = ColumnarChain(ANALYTICS_DIR)  # Swap in a fresh mapping
+        time.sleep(interval)
+
+
+ANALYTICS_REPORTS = {
+    'volume': lambda q, k, asset, ranges: q.volume_per_address(k=k, asset=asset, **ranges),
+    'fees_per_day': lambda q, k, asset, ranges: q.fee_totals_per_day(**ranges),
+    'validator_rewards': lambda q, k, asset, ranges: q.validator_rewards(k=k, **ranges),
+    'top_holders': lambda q, k, asset, ranges: q.top_holders(k=k, asset=asset, **ranges),
+}
+
+
+@app.route('/analytics/<report>', methods=['GET'])
+def analytics(report):
+    if report not in ANALYTICS_REPORTS:
+        return jsonify({'error': f'Unknown report, expected one of {sorted(ANALYTICS_REPORTS)}'}), 404
+
+    ranges = {}
+    for name in ('from_height', 'to_height'):
+        if name in request.args:
+            ranges[name] = request.args.get(name, type=int)
+    for name in ('from_time', 'to_time'):
+        if name in request.args:
+            ranges[name] = request.args.get(name, type=float)
+    k = request.args.get('k', 20, type=int)
+    asset = request.args.get('asset', 'ZINC')
+
+    query = chain_analytics
+    return jsonify({
+        'report': report,
+        'rows_indexed': query.rows,
+        'result': ANALYTICS_REPORTS[report](query, k, asset, ranges)
+    }), 200
+
 @app.route('/vote', methods=['POST'])
 def vote_on_block():
     data = request.json
@@ -363,5 +732,8 @@ def propose_block():
 
 if __name__ == '__main__':
     threading.Thread(target=run_validator_monitor, daemon=True).start()
+    threading.Thread(target=run_chain_exporter, daemon=True).start()
+    key_pool.start()
+    start_auto_consensus(consensus)
     app.run(debug=True, port=5000)
 
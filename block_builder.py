@@ -0,0 +1,177 @@
+import bisect
+import json
+import threading
+
+
+def tx_size(tx):
+    """Serialized size of a pending transaction in bytes."""
+    return len(json.dumps(tx, sort_keys=True).encode())
+
+
+def tx_fee(tx):
+    """Fee a tx offers for priority: its ZINC fee plus the AINC fee a transfer settles."""
+    return float(tx.get('fee', 0)) + float(tx.get('ainc_fee', 0))
+
+
+class BlockTemplateBuilder:
+    """
+    Fee-ordered view of the mempool that assembles block templates.
+
+    Transactions are kept sorted by fee rate (fee per serialized byte, ties
+    broken by arrival order) as they arrive. The template is filled greedily in
+    that order up to MAX_BLOCK_BYTES / MAX_BLOCK_TXS while each sender's
+    cumulative spend per asset, including the settlement charges (fees,
+    commissions) a transfer triggers, stays within their balance;
+    conflicting transactions are skipped and stay in the pool for a later
+    block.
+
+    The template is extended in place while the mempool fills and only
+    rebuilt when a better-paying transaction would displace part of it, so a
+    proposal is usually a copy of an already assembled list.
+    """
+
+    MAX_BLOCK_BYTES = 1_000_000
+    MAX_BLOCK_TXS = 2000
+    EXEMPT_SENDERS = {"ZINC_REWARD"}
+
+    def __init__(self, balance_of, charges_of=None, max_bytes=None, max_txs=None):
+        self.balance_of = balance_of  # (address, asset) -> balance
+        self.charges_of = charges_of or (lambda tx: {})  # tx -> { asset: settlement debit }
+        self.max_bytes = max_bytes or self.MAX_BLOCK_BYTES
+        self.max_txs = max_txs or self.MAX_BLOCK_TXS
+        self.lock = threading.Lock()
+        self.order = []  # Sorted keys: (-fee_rate, seq, txid)
+        self.entries = {}  # { txid: (key, tx, size) }
+        self.sender_spend = {}  # { sender: ZINC amount + fee of pooled txs }
+        self.seq = 0
+        self._reset_template()
+
+    def _reset_template(self):
+        self.template = []
+        self.template_ids = set()
+        self.template_bytes = 0
+        self.template_spend = {}  # { (sender, asset): amount }
+        self.dirty = False
+
+    @staticmethod
+    def tx_key(tx):
+        return tx.get('txid') or json.dumps(tx, sort_keys=True)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _try_append(self, txid, tx, size):
+        """Add tx to the current template if it fits the limits and sender balance."""
+        if len(self.template) >= self.max_txs or self.template_bytes + size > self.max_bytes:
+            return False
+
+        sender = tx.get('sender')
+        amount = tx.get('amount', 0)
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)) or not amount > 0:
+            return False  # Malformed amounts never reach a block
+        # The ZINC fee is paid to the validator on top of the amount
+        cost = {'ZINC': amount + tx.get('fee', 0)}
+        for asset, charge in self.charges_of(tx).items():
+            cost[asset] = cost.get(asset, 0) + charge
+        spend = {asset: self.template_spend.get((sender, asset), 0) + value for asset, value in cost.items()}
+        if sender not in self.EXEMPT_SENDERS and any(
+                value > self.balance_of(sender, asset) for asset, value in spend.items()):
+            return False
+
+        self.template.append(tx)
+        self.template_ids.add(txid)
+        self.template_bytes += size
+        for asset, value in spend.items():
+            self.template_spend[(sender, asset)] = value
+        return True
+
+    @staticmethod
+    def _own_spend(tx):
+        return tx.get('amount', 0) + tx.get('fee', 0)
+
+    def pending_spend(self, sender):
+        """ZINC the sender has committed to pooled transactions not yet in a block."""
+        with self.lock:
+            return self.sender_spend.get(sender, 0)
+
+    def add(self, tx):
+        size = tx_size(tx)
+        fee_rate = tx_fee(tx) / size
+        txid = self.tx_key(tx)
+
+        with self.lock:
+            if txid in self.entries:
+                return False
+            self.seq += 1
+            key = (-fee_rate, self.seq, txid)
+            bisect.insort(self.order, key)
+            self.entries[txid] = (key, tx, size)
+            sender = tx.get('sender')
+            self.sender_spend[sender] = self.sender_spend.get(sender, 0) + self._own_spend(tx)
+
+            if self.dirty:
+                return True
+            # A lower-paying tx can only ever be appended at the end of the
+            # template; a better-paying one may displace existing entries.
+            if not self.template or key > self.entries[self._last_template_id()][0]:
+                self._try_append(txid, tx, size)
+            else:
+                self.dirty = True
+            return True
+
+    def _last_template_id(self):
+        return self.tx_key(self.template[-1])
+
+    def remove(self, txids):
+        with self.lock:
+            for txid in txids:
+                entry = self.entries.pop(txid, None)
+                if entry is None:
+                    continue
+                index = bisect.bisect_left(self.order, entry[0])
+                if index < len(self.order) and self.order[index] == entry[0]:
+                    del self.order[index]
+                sender = entry[1].get('sender')
+                spend = self.sender_spend.pop(sender, 0) - self._own_spend(entry[1])
+                if spend > 1e-12:
+                    self.sender_spend[sender] = spend
+                if txid in self.template_ids:
+                    self.dirty = True
+
+    def refresh(self):
+        """Force a rebuild on the next build(), e.g. after balances changed."""
+        with self.lock:
+            self.dirty = True
+
+    def clear(self):
+        with self.lock:
+            self.order = []
+            self.entries = {}
+            self.sender_spend = {}
+            self._reset_template()
+
+    def _rebuild(self):
+        self._reset_template()
+        for key in self.order:
+            if len(self.template) >= self.max_txs or self.template_bytes >= self.max_bytes:
+                break
+            txid = key[2]
+            _, tx, size = self.entries[txid]
+            self._try_append(txid, tx, size)
+
+    def build(self):
+        """Return the transactions for the next block, highest fee rate first."""
+        with self.lock:
+            if self.dirty:
+                self._rebuild()
+            return list(self.template)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'pool_size': len(self.entries),
+                'template_txs': len(self.template),
+                'template_bytes': self.template_bytes,
+                'max_txs': self.max_txs,
+                'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,142 @@
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+
+
+class BlockArchive:
+    """
+    Append-only on-disk block history in gzip-compressed JSON segments.
+
+    Each block is written through to segment_<first index>.jsonl as it is
+    archived, so nothing waits in memory to reach disk. Once segment_size
+    blocks are in, the segment is compacted to segment_<first index>.json.gz.
+    Reads go through a small LRU of decoded segments so scanning neighbouring
+    blocks hits disk once; the open segment is read line by line.
+    """
+
+    def __init__(self, directory, segment_size=1000, cache_segments=8):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.cache_segments = cache_segments
+        self.count = 0  # Number of archived blocks, sealed or in the open segment
+        self.open_offsets = []  # Byte offset of each line in the open segment
+        self.open_bytes = 0
+        self.cache = OrderedDict()  # { segment_start: [block_dict, ...] }
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _segment_path(self, start):
+        return os.path.join(self.directory, f"segment_{start:010d}.json.gz")
+
+    def _open_path(self, start):
+        return os.path.join(self.directory, f"segment_{start:010d}.jsonl")
+
+    def append(self, block_dict):
+        with self.lock:
+            start = self.count - len(self.open_offsets)
+            line = (json.dumps(block_dict) + "\n").encode()
+            with open(self._open_path(start), "ab" if self.open_offsets else "wb") as f:
+                f.write(line)
+            self.open_offsets.append(self.open_bytes)
+            self.open_bytes += len(line)
+            self.count += 1
+            if len(self.open_offsets) >= self.segment_size:
+                self._seal(start)
+
+    def _seal(self, start):
+        path = self._open_path(start)
+        with open(path, "rb") as f:
+            blocks = [json.loads(line) for line in f]
+        with gzip.open(self._segment_path(start), "wt") as f:
+            json.dump(blocks, f)
+        os.remove(path)
+        self.open_offsets = []
+        self.open_bytes = 0
+
+    def get(self, offset):
+        """Return the archived block at the given archive offset."""
+        with self.lock:
+            if offset < 0 or offset >= self.count:
+                raise IndexError(f"Block #{offset} is not archived")
+
+            start = offset - offset % self.segment_size
+            open_from = self.count - len(self.open_offsets)
+            if offset >= open_from:
+                with open(self._open_path(open_from), "rb") as f:
+                    f.seek(self.open_offsets[offset - open_from])
+                    return json.loads(f.readline())
+
+            segment = self.cache.get(start)
+            if segment is None:
+                with gzip.open(self._segment_path(start), "rt") as f:
+                    segment = json.load(f)
+                self.cache[start] = segment
+                while len(self.cache) > self.cache_segments:
+                    self.cache.popitem(last=False)
+            self.cache.move_to_end(start)
+            return segment[offset - start]
+
+
+class PrunedChain:
+    """
+    List-like chain that keeps only the last keep_blocks blocks in memory.
+
+    Older blocks are either dropped (pruned mode, archive is None) or encoded
+    and handed to a BlockArchive (archival mode) and decoded again on access.
+    len(), chain[-1] and chain[i] keep working, so callers written against a
+    plain list do not need to know the node is pruning.
+    """
+
+    def __init__(self, keep_blocks, encode, decode, archive=None):
+        self.keep_blocks = keep_blocks
+        self.encode = encode
+        self.decode = decode
+        self.archive = archive
+        self.blocks = deque()
+        self.offset = 0  # Height of the oldest block still in memory
+
+    def __len__(self):
+        return self.offset + len(self.blocks)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("chain index out of range")
+        if index >= self.offset:
+            return self.blocks[index - self.offset]
+        if self.archive is None:
+            raise IndexError(f"Block #{index} has been pruned")
+        return self.decode(self.archive.get(index))
+
+    def __iter__(self):
+        """Iterate over the blocks held in memory, oldest first."""
+        return iter(list(self.blocks))
+
+    def is_available(self, index):
+        return index >= self.offset or self.archive is not None
+
+    def append(self, block):
+        self.blocks.append(block)
+        while len(self.blocks) > self.keep_blocks:
+            old = self.blocks.popleft()
+            if self.archive is not None:
+                self.archive.append(self.encode(old))
+            self.offset += 1
+
+    def pop(self):
+        if not self.blocks:
+            raise IndexError("No in-memory block to pop")
+        return self.blocks.pop()
+
+    def stats(self):
+        return {
+            'height': len(self),
+            'in_memory': len(self.blocks),
+            'first_in_memory': self.offset,
+            'archived': self.archive.count if self.archive is not None else 0
+        }
@@ -0,0 +1,170 @@
+import threading
+from collections import OrderedDict
+
+# insert() results
+KNOWN = "known"
+EXTENDED = "extended"
+REORG = "reorg"
+SIDE = "side"
+ORPHAN = "orphan"
+INVALID = "invalid"
+
+
+class TreeNode:
+    __slots__ = ("block", "parent", "height", "weight", "journal")
+
+    def __init__(self, block, parent, weight):
+        self.block = block
+        self.parent = parent
+        self.height = block.index
+        self.weight = weight  # Cumulative stake weight from genesis
+        self.journal = None  # Undo journal while the block is on the main chain
+
+
+class BlockTree:
+    """
+    Block tree indexed by hash with cumulative-stake fork choice.
+
+    Every block extends a parent already in the tree; its weight is the
+    parent's weight plus the stake of the validator that produced it. The
+    main chain ends at the heaviest leaf (ties keep the current tip). When a
+    heavier branch appears, the blocks above the fork point are disconnected
+    newest-first using the undo journals recorded when they were connected,
+    and the new branch is connected oldest-first, so a reorg costs
+    O(reorg depth).
+
+    Blocks whose parent is unknown wait in a bounded orphan pool. Nodes more
+    than max_reorg_depth below the tip are forgotten together with their
+    journals, which bounds memory and the deepest possible reorg.
+    """
+
+    def __init__(self, genesis, connect, disconnect, block_weight, max_reorg_depth=100, max_orphans=256):
+        self.connect = connect  # connect(block) -> journal
+        self.disconnect = disconnect  # disconnect(block, journal)
+        self.block_weight = block_weight
+        self.max_reorg_depth = max_reorg_depth
+        self.max_orphans = max_orphans
+        self.lock = threading.RLock()
+
+        root = TreeNode(genesis, None, 0)
+        self.nodes = {genesis.hash: root}
+        self.by_height = {genesis.index: {genesis.hash}}
+        self.tip = root
+        self.orphans = OrderedDict()  # { block_hash: block }
+        self.orphans_by_parent = {}  # { parent_hash: {block_hash, ...} }
+        self.reorgs = 0
+
+    @property
+    def horizon(self):
+        """Lowest height still tracked; blocks at or below it cannot fork."""
+        return max(0, self.tip.height - self.max_reorg_depth)
+
+    def insert(self, block):
+        with self.lock:
+            if block.hash in self.nodes or block.hash in self.orphans:
+                return KNOWN
+
+            parent = self.nodes.get(block.previous_hash)
+            if parent is None:
+                if block.index <= self.horizon + 1:
+                    return INVALID
+                self._add_orphan(block)
+                return ORPHAN
+            if block.index != parent.height + 1:
+                return INVALID
+
+            result = self._attach(parent, block)
+            # Connecting a block may unlock orphans waiting on it
+            pending = [block.hash]
+            while pending:
+                parent_hash = pending.pop()
+                for child_hash in self.orphans_by_parent.pop(parent_hash, ()):
+                    child = self.orphans.pop(child_hash, None)
+                    if child is None or child.index != self.nodes[parent_hash].height + 1:
+                        continue
+                    child_result = self._attach(self.nodes[parent_hash], child)
+                    if child_result in (EXTENDED, REORG):
+                        result = REORG if REORG in (result, child_result) else EXTENDED
+                    pending.append(child_hash)
+            self._prune()
+            return result
+
+    def _attach(self, parent, block):
+        node = TreeNode(block, parent, parent.weight + self.block_weight(block))
+        self.nodes[block.hash] = node
+        self.by_height.setdefault(node.height, set()).add(block.hash)
+
+        if node.weight <= self.tip.weight:
+            return SIDE
+        if parent is self.tip:
+            node.journal = self.connect(block)
+            self.tip = node
+            return EXTENDED
+        return self._reorg(node)
+
+    def _fork_point(self, new_tip):
+        """Walk both branches back to their common block; None if it was pruned."""
+        old, new = self.tip, new_tip
+        new_branch = []
+        while new is not None and old is not None and old is not new:
+            if new.height >= old.height:
+                new_branch.append(new)
+                new = new.parent
+            else:
+                old = old.parent
+        if new is None or old is None:
+            return None, []
+        return new, new_branch
+
+    def _reorg(self, new_tip):
+        fork, new_branch = self._fork_point(new_tip)
+        if fork is None:
+            return SIDE
+
+        node = self.tip
+        while node is not fork:
+            self.disconnect(node.block, node.journal)
+            node.journal = None
+            node = node.parent
+        for node in reversed(new_branch):
+            node.journal = self.connect(node.block)
+
+        print(f"[Fork] Reorg from #{self.tip.height} to #{new_tip.height} via fork point #{fork.height}")
+        self.tip = new_tip
+        self.reorgs += 1
+        return REORG
+
+    def _add_orphan(self, block):
+        self.orphans[block.hash] = block
+        self.orphans_by_parent.setdefault(block.previous_hash, set()).add(block.hash)
+        while len(self.orphans) > self.max_orphans:
+            old_hash, old = self.orphans.popitem(last=False)
+            siblings = self.orphans_by_parent.get(old.previous_hash)
+            if siblings:
+                siblings.discard(old_hash)
+                if not siblings:
+                    del self.orphans_by_parent[old.previous_hash]
+
+    def _prune(self):
+        horizon = self.horizon
+        # Keep the main-chain block at the horizon as the new root
+        root = self.tip
+        while root.height > horizon:
+            root = root.parent
+        for height in [h for h in self.by_height if h <= horizon]:
+            for block_hash in self.by_height.pop(height):
+                if block_hash != root.block.hash:
+                    self.nodes.pop(block_hash, None)
+        self.by_height[root.height] = {root.block.hash}
+        root.parent = None
+        root.journal = None
+
+    def stats(self):
+        with self.lock:
+            return {
+                'tip_height': self.tip.height,
+                'tip_weight': self.tip.weight,
+                'tracked_blocks': len(self.nodes),
+                'orphans': len(self.orphans),
+                'reorgs': self.reorgs
+            }
@@ -3,46 +3,61 @@ import json
 import time
 import random
 from ecdsa import VerifyingKey, SECP256k1
+from block_builder import BlockTemplateBuilder
+from block_store import BlockArchive, PrunedChain
+from settlement import SettlementLedger, transfer_ref
+from block_tree import BlockTree, EXTENDED, REORG
 
 class Transaction:
-    def __init__(self, sender, recipient, amount, signature="", **kwargs):
+    def __init__(self, sender, recipient=None, amount=0, signature="", **kwargs):
+        if recipient is None:
+            recipient = kwargs.pop('receiver', None)  # Mempool txs use 'receiver'
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+            raise ValueError(f"Transaction amount must be a number, got {amount!r}")
         self.sender = sender
         self.recipient = recipient
         self.amount = amount
         self.signature = signature
+        self.extra = kwargs  # Optional mempool fields (txid, timestamp, fee, ...)
 
     def to_dict(self):
-        return {
+        data = {
             'sender': self.sender,
             'recipient': self.recipient,
             'amount': self.amount,
             'signature': self.signature
         }
+        data.update(self.extra)
+        return data
 
     def compute_hash(self):
         return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()
 
 class Block:
-    def __init__(self, index, previous_hash, transactions, timestamp=None, validator=None, hash=None):
+    def __init__(self, index, previous_hash, transactions, timestamp=None, validator=None, hash=None, settlements=None):
         self.index = index
         self.previous_hash = previous_hash
         self.timestamp = timestamp or time.time()
         self.transactions = transactions  # List of Transaction objects
         self.validator = validator
+        self.settlements = settlements or []  # Gross fee/commission breakdown behind settlement txs
         self.hash = hash or self.compute_hash()
 
     def compute_hash(self):
-        block_data = json.dumps({
+        data = {
             'index': self.index,
             'previous_hash': self.previous_hash,
             'timestamp': self.timestamp,
             'transactions': [tx.to_dict() for tx in self.transactions],
             'validator': self.validator
-        }, sort_keys=True).encode()
+        }
+        if self.settlements:
+            data['settlements'] = self.settlements
+        block_data = json.dumps(data, sort_keys=True).encode()
         return hashlib.sha256(block_data).hexdigest()
 
     def to_dict(self):
-        return {
+        data = {
             'index': self.index,
             'previous_hash': self.previous_hash,
             'timestamp': self.timestamp,
@@ -50,6 +65,9 @@ class Block:
             'validator': self.validator,
             'hash': self.hash
         }
+        if self.settlements:
+            data['settlements'] = self.settlements
+        return data
 
     @staticmethod
     def from_dict(data):
@@ -60,7 +78,8 @@ class Block:
             transactions=transactions,
             timestamp=data['timestamp'],
             validator=data['validator'],
-            hash=data.get('hash')
+            hash=data.get('hash'),
+            settlements=data.get('settlements')
         )
 
     @staticmethod
@@ -71,40 +90,220 @@ class Block:
             previous_hash=data['previous_hash'],
             transactions=transactions,
             timestamp=data.get('timestamp'),
-            validator=data.get('validator')
+            validator=data.get('validator'),
+            settlements=data.get('settlements')
         )
 
 
+# Fixed so every node derives the same genesis hash
+GENESIS_TIMESTAMP = 1735689600.0
+MAX_REORG_DEPTH = 100
+
+
 class Blockchain:
-    def __init__(self):
-        self.chain = []
+    def __init__(self, mode="full", keep_blocks=1000, archive_dir="chain_archive", stake_of=None):
+        # full: every block in memory
+        # pruned: keep the last keep_blocks blocks, drop older bodies
+        # archival: keep the last keep_blocks blocks, move older ones to disk
+        if mode == "full":
+            self.chain = []
+        elif mode in ("pruned", "archival"):
+            archive = BlockArchive(archive_dir) if mode == "archival" else None
+            self.chain = PrunedChain(keep_blocks, Block.to_dict, Block.from_dict, archive)
+        else:
+            raise ValueError(f"Unknown chain mode: {mode}")
+        self.mode = mode
         self.current_transactions = []
         self.balances = {}
+        self.ainc_balances = {}
         self.stakes = {}
         self.nodes = set()
+        self.state_version = 0  # Bumped whenever balances or stakes change
+        self.nonces = {}  # Highest nonce included in a block, per account
+        self.pending_nonces = {}  # Highest nonce admitted to the pool, per account
         self.create_genesis_block()
         self.pending_transactions = []
+        self.settlement_ledger = SettlementLedger(max_history=MAX_REORG_DEPTH)
+        self.block_builder = BlockTemplateBuilder(self.get_asset_balance, self.settlement_charges)
+
+        # Fork choice: heaviest branch by cumulative validator stake
+        self.stake_of = stake_of or (lambda validator: self.stakes.get(validator, 0))
+        max_reorg_depth = MAX_REORG_DEPTH if mode == "full" else min(MAX_REORG_DEPTH, keep_blocks - 1)
+        self.tree = BlockTree(
+            self.chain[0],
+            connect=self._connect_block,
+            disconnect=self._disconnect_block,
+            block_weight=lambda block: max(1, self.stake_of(block.validator)),
+            max_reorg_depth=max_reorg_depth
+        )
 
     def add_pending_transaction(self, tx):
         self.pending_transactions.append(tx)
+        self.block_builder.add(tx)
 
     def get_pending_transactions(self):
         return self.pending_transactions
 
+    def get_pending_spend(self, address):
+        """ZINC an account has committed to pooled transactions."""
+        return self.block_builder.pending_spend(address)
+
+    def get_block_template(self):
+        """Fee-ordered transactions for the next block, within size/count limits."""
+        return self.block_builder.build()
+
+    def remove_pending_transactions(self, txs):
+        """Drop included transactions from the pool, keeping the remainder."""
+        included = {BlockTemplateBuilder.tx_key(tx) for tx in txs}
+        self.pending_transactions = [
+            tx for tx in self.pending_transactions
+            if BlockTemplateBuilder.tx_key(tx) not in included
+        ]
+        self.block_builder.remove(included)
+
     def clear_pending_transactions(self):
         self.pending_transactions = []
+        self.block_builder.clear()
 
     def create_genesis_block(self):
-        genesis_block = Block(0, "0", [], time.time(), validator="genesis")
+        genesis_block = Block(0, "0", [], GENESIS_TIMESTAMP, validator="genesis")
         self.chain.append(genesis_block)
 
     def get_last_block(self):
         return self.chain[-1]
 
-    def add_transaction(self, sender, recipient, amount, signature):
+    def get_block(self, index):
+        """Return the block at a height, or None if it is unknown or pruned."""
+        try:
+            return self.chain[index]
+        except IndexError:
+            return None
+
+    def get_block_version(self, index):
+        """
+        Cache version of the block at a height, found without decoding it:
+        the hash of an in-memory block, or "archived" for a block moved to
+        disk (below the reorg window, so it can no longer change).
+        None if the block is unknown or pruned.
+        """
+        if isinstance(self.chain, PrunedChain) and 0 <= index < self.chain.offset:
+            return "archived" if self.chain.archive is not None else None
+        block = self.get_block(index)
+        return block.hash if block else None
+
+    def get_asset_balance(self, address, asset):
+        if asset == 'AINC':
+            return self.get_balance_ainc(address)
+        return self.get_balance(address)
+
+    def settlement_charges(self, tx):
+        """Unsettled fees/commissions owed because of a pooled transfer, per asset."""
+        if tx.get('nonce') is None:
+            return {}
+        return self.settlement_ledger.charges(transfer_ref(tx.get('sender'), tx['nonce']))
+
+    def seal_settlements(self, txs):
+        """
+        Seal the accruals a block carrying txs may settle. Accruals of
+        transfers still waiting in the pool stay owed until their transfer
+        is included, so nobody pays for a transfer that has not landed.
+        """
+        included = {BlockTemplateBuilder.tx_key(tx) for tx in txs}
+        waiting = {
+            transfer_ref(tx.get('sender'), tx['nonce']) for tx in self.pending_transactions
+            if tx.get('nonce') is not None and BlockTemplateBuilder.tx_key(tx) not in included
+        }
+        return self.settlement_ledger.seal(exclude=waiting)
+
+    def get_balance(self, address):
+        return self.balances.get(address, 0)
+
+    def get_balance_ainc(self, address):
+        return self.ainc_balances.get(address, 0)
+
+    def receive_block(self, block):
+        """
+        Insert a block into the block tree. Returns one of the block_tree
+        results: extended / reorg (now on the main chain), side (stored on a
+        lighter branch), orphan (parent unknown), known or invalid.
+        """
+        return self.tree.insert(block)
+
+    def add_block(self, block):
+        """Add a block; True if it ends up on the main chain."""
+        return self.receive_block(block) in (EXTENDED, REORG)
+
+    def _connect_block(self, block):
+        self.chain.append(block)
+        journal = self.apply_transactions(block.transactions, block.validator)
+        self.settlement_ledger.resettle(block.hash)
+        # Included transactions leave the pool; the rest wait for a later block
+        self.remove_pending_transactions([tx.to_dict() for tx in block.transactions])
+        self.block_builder.refresh()
+        return journal
+
+    def _disconnect_block(self, block, journal):
+        self.chain.pop()
+        self.undo_transactions(journal)
+        # Its settlement txs are undone too, so the fees and commissions are owed again
+        self.settlement_ledger.unsettle(block.hash)
+        # Back to the pool; whatever the new branch includes is removed again
+        for tx in block.transactions:
+            if tx.extra.get('txid'):
+                self.add_pending_transaction(tx.to_dict())
+        self.block_builder.refresh()
+
+    def apply_transactions(self, transactions, validator=None):
+        """
+        Apply transactions and return an undo journal of the values they replaced.
+        ZINC fees are paid to the validator of the block.
+        """
+        journal = {'balances': {}, 'ainc_balances': {}, 'nonces': {}}
+        for tx in transactions:
+            # Settlement txs carry an asset; everything else moves ZINC
+            name = 'ainc_balances' if tx.extra.get('asset') == 'AINC' else 'balances'
+            balances = getattr(self, name)
+            for address in (tx.sender, tx.recipient):
+                journal[name].setdefault(address, balances.get(address))
+            balances[tx.sender] = balances.get(tx.sender, 0) - tx.amount
+            balances[tx.recipient] = balances.get(tx.recipient, 0) + tx.amount
+            fee = tx.extra.get('fee', 0)
+            if fee and validator is not None:
+                journal['balances'].setdefault(validator, self.balances.get(validator))
+                self.balances[tx.sender] -= fee
+                self.balances[validator] = self.balances.get(validator, 0) + fee
+            nonce = tx.extra.get('nonce')
+            if nonce is not None and nonce > self.nonces.get(tx.sender, 0):
+                journal['nonces'].setdefault(tx.sender, self.nonces.get(tx.sender))
+                self.nonces[tx.sender] = nonce
+        self.state_version += 1
+        return journal
+
+    def undo_transactions(self, journal):
+        for name in ('balances', 'ainc_balances', 'nonces'):
+            store, previous = getattr(self, name), journal[name]
+            for key, value in previous.items():
+                if value is None:
+                    store.pop(key, None)
+                else:
+                    store[key] = value
+        self.state_version += 1
+
+    def get_nonce(self, address):
+        """Highest nonce used by an account, counting admitted pending txs."""
+        return max(self.nonces.get(address, 0), self.pending_nonces.get(address, 0))
+
+    def reserve_nonce(self, address, nonce):
+        """Accept a nonce only if it is above every nonce the account used before."""
+        if nonce <= self.get_nonce(address):
+            return False
+        self.pending_nonces[address] = nonce
+        return True
+
+    def add_transaction(self, sender, recipient, amount, signature, **extra):
         if sender != "ZINC_REWARD" and self.balances.get(sender, 0) < amount:
             return False
-        tx = Transaction(sender, recipient, amount, signature)
+        tx = Transaction(sender, recipient, amount, signature, **extra)
         self.current_transactions.append(tx)
         return True
 
@@ -129,24 +328,29 @@ class Blockchain:
 
     def forge_block(self):
         validator = self.select_validator()
+        settlement_txs, breakdown = self.seal_settlements([tx.to_dict() for tx in self.current_transactions])
+        # The reward travels in the block, so a reorg undoes it with the rest
+        transactions = self.current_transactions + [Transaction(**tx) for tx in settlement_txs]
+        transactions.append(Transaction("ZINC_REWARD", validator, 10))
         block = Block(
             index=len(self.chain),
             previous_hash=self.get_last_block().hash,
-            transactions=self.current_transactions,
-            validator=validator
+            transactions=transactions,
+            validator=validator,
+            settlements=breakdown
         )
-        self.chain.append(block)
-        for tx in self.current_transactions:
-            self.balances[tx.sender] = self.balances.get(tx.sender, 0) - tx.amount
-            self.balances[tx.recipient] = self.balances.get(tx.recipient, 0) + tx.amount
-        reward_tx = Transaction("ZINC_REWARD", validator, 10)
-        self.balances[validator] = self.balances.get(validator, 0) + 10
-        self.current_transactions = [reward_tx]
+        if not self.add_block(block):
+            self.settlement_ledger.rollback()
+            return False
+        self.settlement_ledger.commit(block.hash)
+        self.current_transactions = []
+        return True
 
     def stake(self, public_key, amount):
         if self.balances.get(public_key, 0) >= amount:
             self.balances[public_key] -= amount
             self.stakes[public_key] = self.stakes.get(public_key, 0) + amount
+            self.state_version += 1
             return True
         return False
 
@@ -0,0 +1,301 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+# Column name -> dtype. One raw little-endian file per column, append-only.
+COLUMNS = {
+    'height': np.int64,
+    'timestamp': np.float64,
+    'sender': np.int32,
+    'recipient': np.int32,
+    'amount': np.float64,
+    'asset': np.int16,
+    'kind': np.int8,
+}
+KINDS = ('transfer', 'settlement', 'reward')
+SECONDS_PER_DAY = 86400
+
+
+def tx_kind(tx):
+    if tx.sender == "ZINC_REWARD":
+        return KINDS.index('reward')
+    if tx.extra.get('type') == 'settlement':
+        return KINDS.index('settlement')
+    return KINDS.index('transfer')
+
+
+class _Dictionary:
+    """Append-only string interning table backed by a text file (one value per line)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.values = []
+        self.ids = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    self._add(line.rstrip("\n"))
+
+    def _add(self, value):
+        self.ids[value] = len(self.values)
+        self.values.append(value)
+
+    def intern(self, value, new_values):
+        value = str(value)
+        if value not in self.ids:
+            self._add(value)
+            new_values.append(value)
+        return self.ids[value]
+
+    def append_to_disk(self, new_values):
+        if new_values:
+            with open(self.path, "a") as f:
+                f.writelines(f"{v}\n" for v in new_values)
+
+
+class ChainExporter:
+    """
+    Incrementally appends finalized transactions to columnar files.
+
+    Only blocks at least `confirmations` below the tip are exported, so a
+    reorg can never rewrite exported history. Account and asset names are
+    interned to integer ids; each column is a flat binary file that
+    ColumnarChain maps into memory without parsing.
+
+    The node does not keep its chain on disk, so the height and hash of the
+    last exported block are stored next to the columns. The first sync
+    checks them against the running chain and starts the export over when
+    the columns came from a different chain.
+    """
+
+    def __init__(self, directory, confirmations=100):
+        self.directory = directory
+        self.confirmations = confirmations
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._open_dictionaries()
+        self.next_height = self._resume_height()
+        self.verified = False  # Columns checked against the running chain
+
+    def _open_dictionaries(self):
+        self.accounts = _Dictionary(os.path.join(self.directory, "accounts.txt"))
+        self.assets = _Dictionary(os.path.join(self.directory, "assets.txt"))
+
+    def _tip_path(self):
+        return os.path.join(self.directory, "tip.json")
+
+    def _read_tip(self):
+        try:
+            with open(self._tip_path(), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_tip(self, height, block_hash):
+        tmp = self._tip_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({'height': height, 'hash': block_hash}, f)
+        os.replace(tmp, self._tip_path())
+
+    def _reset(self, reason):
+        print(f"[WARN] Columnar export does not match this chain ({reason}), rebuilding it")
+        for name in COLUMNS:
+            if os.path.exists(self._column_path(name)):
+                os.truncate(self._column_path(name), 0)
+        for path in (self.accounts.path, self.assets.path, self._tip_path()):
+            if os.path.exists(path):
+                os.remove(path)
+        self._open_dictionaries()
+        self.next_height = 1
+
+    def _verify(self, blockchain):
+        """
+        Check the exported rows against the running chain. Returns False
+        until the last exported height is deep enough to compare.
+        """
+        tip = self._read_tip()
+        if tip is None:
+            if self.next_height > 1:
+                self._reset("no record of the last exported block")
+            return True
+        if tip['height'] > len(blockchain.chain) - 1 - self.confirmations:
+            return False
+        block = blockchain.get_block(tip['height'])
+        if block is None or block.hash != tip['hash']:
+            self._reset(f"block #{tip['height']} differs")
+        return True
+
+    def _column_path(self, name):
+        return os.path.join(self.directory, f"{name}.bin")
+
+    def _resume_height(self):
+        """
+        Line the columns up again and return the next height to export.
+
+        A crash between (or inside) column writes leaves the files uneven,
+        so every column is cut to the shortest one. The last block may be
+        only partly written, so its rows are dropped too and it is exported
+        again on the next sync.
+        """
+        paths = {name: self._column_path(name) for name in COLUMNS}
+        rows = min(os.path.getsize(p) // np.dtype(COLUMNS[n]).itemsize if os.path.exists(p) else 0
+                   for n, p in paths.items())
+        next_height = 1  # Genesis carries no transactions
+        if rows:
+            heights = np.memmap(paths['height'], dtype=COLUMNS['height'], mode="r", shape=(rows,))
+            next_height = int(heights[-1])
+            rows = int(np.searchsorted(heights, next_height, side="left"))
+            del heights
+        for name, path in paths.items():
+            if os.path.exists(path):
+                os.truncate(path, rows * np.dtype(COLUMNS[name]).itemsize)
+        return next_height
+
+    def sync(self, blockchain):
+        """Export every block that is now deep enough. Returns the number of rows written."""
+        with self.lock:
+            if not self.verified:
+                if not self._verify(blockchain):
+                    return 0
+                self.verified = True
+            last = len(blockchain.chain) - 1 - self.confirmations
+            rows = {name: [] for name in COLUMNS}
+            new_accounts, new_assets = [], []
+            tip = None
+
+            height = self.next_height
+            while height <= last:
+                block = blockchain.get_block(height)
+                if block is None:
+                    print(f"[WARN] Block #{height} is pruned, skipping it in the columnar export")
+                    height += 1
+                    continue
+                for tx in block.transactions:
+                    rows['height'].append(block.index)
+                    rows['timestamp'].append(block.timestamp)
+                    rows['sender'].append(self.accounts.intern(tx.sender, new_accounts))
+                    rows['recipient'].append(self.accounts.intern(tx.recipient, new_accounts))
+                    rows['amount'].append(float(tx.amount))
+                    rows['asset'].append(self.assets.intern(tx.extra.get('asset', 'ZINC'), new_assets))
+                    rows['kind'].append(tx_kind(tx))
+                tip = block
+                height += 1
+
+            # Dictionaries first so every id written to a column resolves
+            self.accounts.append_to_disk(new_accounts)
+            self.assets.append_to_disk(new_assets)
+            for name, dtype in COLUMNS.items():
+                if rows[name]:
+                    with open(self._column_path(name), "ab") as f:
+                        np.asarray(rows[name], dtype=dtype).tofile(f)
+            if tip is not None:
+                self._write_tip(tip.index, tip.hash)
+            self.next_height = height
+            return len(rows['height'])
+
+
+class ColumnarChain:
+    """
+    Vectorized queries over the exported columns.
+
+    Columns are memory-mapped, height/time ranges become slices found by
+    binary search (rows are appended in height order), and aggregations are
+    bincount / argpartition over interned ids, so no Python loop touches
+    individual transactions.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.refresh()
+
+    def refresh(self):
+        """Re-map the columns after the exporter appended rows."""
+        paths = {name: os.path.join(self.directory, f"{name}.bin") for name in COLUMNS}
+        sizes = [os.path.getsize(p) // np.dtype(COLUMNS[n]).itemsize if os.path.exists(p) else 0
+                 for n, p in paths.items()]
+        # A crash between column writes can leave them uneven; trust the shortest
+        self.rows = min(sizes)
+        self.columns = {}
+        for name, path in paths.items():
+            if self.rows:
+                self.columns[name] = np.memmap(path, dtype=COLUMNS[name], mode="r", shape=(self.rows,))
+            else:
+                self.columns[name] = np.empty(0, dtype=COLUMNS[name])
+        self.accounts = _Dictionary(os.path.join(self.directory, "accounts.txt"))
+        self.assets = _Dictionary(os.path.join(self.directory, "assets.txt"))
+
+    def _range(self, from_height=None, to_height=None, from_time=None, to_time=None):
+        """Row slice for an inclusive height range and a [from_time, to_time) window."""
+        start, stop = 0, self.rows
+        heights = self.columns['height']
+        if from_height is not None:
+            start = int(np.searchsorted(heights, from_height, side="left"))
+        if to_height is not None:
+            stop = int(np.searchsorted(heights, to_height, side="right"))
+        mask = None
+        if from_time is not None or to_time is not None:
+            timestamps = self.columns['timestamp'][start:stop]
+            mask = np.ones(stop - start, dtype=bool)
+            if from_time is not None:
+                mask &= timestamps >= from_time
+            if to_time is not None:
+                mask &= timestamps < to_time
+        return slice(start, stop), mask
+
+    def _select(self, names, kind=None, asset=None, **ranges):
+        rows, mask = self._range(**ranges)
+        selected = {name: self.columns[name][rows] for name in names}
+        if kind is not None:
+            kind_mask = self.columns['kind'][rows] == KINDS.index(kind)
+            mask = kind_mask if mask is None else mask & kind_mask
+        if asset is not None:
+            asset_id = self.assets.ids.get(asset, -1)
+            asset_mask = self.columns['asset'][rows] == asset_id
+            mask = asset_mask if mask is None else mask & asset_mask
+        if mask is not None:
+            selected = {name: column[mask] for name, column in selected.items()}
+        return selected
+
+    def _sum_by_account(self, by, kind=None, asset=None, **ranges):
+        cols = self._select([by, 'amount'], kind=kind, asset=asset, **ranges)
+        return np.bincount(cols[by], weights=cols['amount'], minlength=len(self.accounts.values))
+
+    def _top(self, totals, k):
+        k = min(k, int(np.count_nonzero(totals)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-totals, k - 1)[:k]
+        top = top[np.argsort(-totals[top])]
+        return [(self.accounts.values[i], float(totals[i])) for i in top]
+
+    def volume_per_address(self, k=20, asset="ZINC", **ranges):
+        """Top addresses by amount sent plus amount received."""
+        totals = (self._sum_by_account('sender', asset=asset, **ranges)
+                  + self._sum_by_account('recipient', asset=asset, **ranges))
+        return self._top(totals, k)
+
+    def fee_totals_per_day(self, fee_account="ainc_fee_pool", **ranges):
+        """Fees paid into fee_account, summed per UTC day."""
+        cols = self._select(['recipient', 'timestamp', 'amount'], **ranges)
+        fee_id = self.accounts.ids.get(fee_account)
+        if fee_id is None:
+            return []
+        mask = cols['recipient'] == fee_id
+        days = (cols['timestamp'][mask] // SECONDS_PER_DAY).astype(np.int64)
+        if days.size == 0:
+            return []
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        totals = np.bincount(inverse, weights=cols['amount'][mask])
+        return [(int(day) * SECONDS_PER_DAY, float(total)) for day, total in zip(unique_days, totals)]
+
+    def validator_rewards(self, k=50, **ranges):
+        """Block rewards received per validator."""
+        return self._top(self._sum_by_account('recipient', kind='reward', **ranges), k)
+
+    def top_holders(self, k=20, asset="ZINC", **ranges):
+        """Accounts with the largest net inflow (received minus sent) of an asset."""
+        totals = (self._sum_by_account('recipient', asset=asset, **ranges)
+                  - self._sum_by_account('sender', asset=asset, **ranges))
+        return self._top(np.clip(totals, 0, None), k)
@@ -0,0 +1,154 @@
+import hashlib
+import random
+import threading
+from collections import OrderedDict
+
+from block_builder import BlockTemplateBuilder
+from utils import generate_txid, hash_data
+
+SHORT_ID_BYTES = 6
+
+
+def tx_id(tx):
+    """Stable id of a transaction dict: its txid, or a hash of its contents."""
+    return tx.get('txid') or hash_data(tx)
+
+
+def content_id(tx):
+    """Recompute a txid from the fields it was generated from (mempool form)."""
+    fields = {k: v for k, v in tx.items() if k != 'txid'}
+    if 'recipient' in fields:  # Block form renames receiver and adds an empty signature
+        fields['receiver'] = fields.pop('recipient')
+    if not fields.get('signature'):
+        fields.pop('signature', None)
+    return generate_txid(fields)
+
+
+def short_id(txid, salt):
+    """Per-block salted short id so collisions cannot be precomputed."""
+    return hashlib.sha256(f"{salt}:{txid}".encode()).hexdigest()[:SHORT_ID_BYTES * 2]
+
+
+class CompactBlockRelay:
+    """
+    Compact block relay: header + salted short transaction ids.
+
+    The sender keeps recently relayed blocks so it can answer a follow-up
+    request for missing transactions. The receiver rebuilds the block from
+    its own mempool and holds partially rebuilt blocks until the missing
+    transactions arrive. Transactions without a txid (rewards, settlements)
+    never travel through the mempool, so they are sent prefilled.
+    """
+
+    def __init__(self, max_blocks=64, max_txs=BlockTemplateBuilder.MAX_BLOCK_TXS):
+        self.max_blocks = max_blocks
+        self.max_txs = max_txs
+        self.sent = OrderedDict()  # { block_hash: block_dict }
+        self.partial = OrderedDict()  # { block_hash: (block_dict, missing_indexes) }
+        self.lock = threading.Lock()
+
+    def _remember(self, store, key, value):
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_blocks:
+            store.popitem(last=False)
+
+    def make_compact(self, block):
+        salt = random.getrandbits(64)
+        txs = block['transactions']
+        message = {
+            'header': {k: v for k, v in block.items() if k != 'transactions'},
+            'salt': salt,
+            'tx_count': len(txs),
+            'tx_root': hash_data([tx_id(tx) for tx in txs]),
+            'short_ids': [],
+            'prefilled': {}
+        }
+        for i, tx in enumerate(txs):
+            if tx.get('txid'):
+                message['short_ids'].append(short_id(tx['txid'], salt))
+            else:
+                message['short_ids'].append(None)
+                message['prefilled'][str(i)] = tx
+
+        with self.lock:
+            self._remember(self.sent, block['hash'], block)
+        return message
+
+    def get_transactions(self, block_hash, indexes):
+        """Serve the transactions a peer could not find in its mempool."""
+        with self.lock:
+            block = self.sent.get(block_hash)
+        if block is None:
+            return None
+        txs = block['transactions']
+        return {str(i): txs[i] for i in indexes if 0 <= i < len(txs)}
+
+    def receive(self, message, mempool):
+        """
+        Rebuild a block from a compact message and the local mempool.
+        Returns (block, missing_indexes); block is None until complete.
+        Raises ValueError if the message is malformed.
+        """
+        salt = message['salt']
+        short_ids = message['short_ids']
+        tx_count = message['tx_count']
+        if (not isinstance(tx_count, int) or not isinstance(short_ids, list)
+                or tx_count != len(short_ids) or tx_count > self.max_txs):
+            raise ValueError("tx_count must match short_ids and stay within the block limit")
+
+        wanted = {}
+        for i, sid in enumerate(short_ids):
+            if sid is not None:
+                wanted.setdefault(sid, []).append(i)
+
+        txs = [None] * tx_count
+        for i, tx in message.get('prefilled', {}).items():
+            i = int(i)
+            if not 0 <= i < tx_count or short_ids[i] is not None or not isinstance(tx, dict):
+                raise ValueError(f"Invalid prefilled transaction at index {i}")
+            txs[i] = tx
+        for tx in mempool:
+            indexes = wanted.get(short_id(tx_id(tx), salt))
+            if indexes:
+                for i in indexes:
+                    txs[i] = tx
+
+        block = dict(message['header'])
+        block['transactions'] = txs
+        missing = [i for i, tx in enumerate(txs) if tx is None]
+        if missing:
+            with self.lock:
+                self._remember(self.partial, block['hash'], (block, message['tx_root']))
+            return None, missing
+        return self._verify(block, message['tx_root'])
+
+    def fill(self, block_hash, transactions):
+        """Complete a partial block with the transactions fetched from the sender."""
+        with self.lock:
+            entry = self.partial.pop(block_hash, None)
+            if entry is None:
+                return None, []
+            block, tx_root = entry
+            for i, tx in transactions.items():
+                i = int(i) if str(i).isdigit() else -1
+                if 0 <= i < len(block['transactions']) and isinstance(tx, dict):
+                    block['transactions'][i] = tx
+            missing = [i for i, tx in enumerate(block['transactions']) if tx is None]
+            if missing:
+                # Keep waiting for the rest
+                self._remember(self.partial, block_hash, entry)
+                return None, missing
+        return self._verify(block, tx_root)
+
+    def _verify(self, block, tx_root):
+        # A short id collision puts the wrong tx in a slot, and a forged fill
+        # carries a txid its fields do not hash to; either way ask for all of them
+        txs = block['transactions']
+        if (hash_data([tx_id(tx) for tx in txs]) != tx_root
+                or any(tx.get('txid') and content_id(tx) != tx['txid'] for tx in txs)):
+            with self.lock:
+                block['transactions'] = [None] * len(block['transactions'])
+                self._remember(self.partial, block['hash'], (block, tx_root))
+            return None, list(range(len(block['transactions'])))
+        return block, []
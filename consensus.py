@@ -4,16 +4,20 @@ import time
 import threading
 import hashlib
 
-from validator import is_validator, load_validators
-from blockchain import Blockchain, add_block, get_pending_transactions, clear_pending_transactions
-from validator import get_current_validator_id, is_validator_active
+import validator
+from blockchain import Blockchain, Block
 
 from vote import reset_votes_for_new_block
 
 
 class Consensus:
-    def __init__(self, blockchain: Blockchain):
+    def __init__(self, blockchain: Blockchain, registry=validator, clock=time.time):
+        # registry: anything with load_validators / is_validator /
+        # get_current_validator_id / is_validator_active (the validator module
+        # by default, an in-memory registry in the simulator)
         self.blockchain = blockchain
+        self.registry = registry
+        self.clock = clock
         self.pending_block = None
         self.pending_block_votes = {}
         self.CONSENSUS_THRESHOLD = 0.66  # 66% required for approval
@@ -23,6 +27,8 @@ class Consensus:
         return hashlib.sha256(block_string.encode()).hexdigest()
 
     def reset(self):
+        # A proposal that never finalized hands its settlements back to the ledger
+        self.blockchain.settlement_ledger.rollback()
         self.pending_block = None
         self.pending_block_votes = {}
 
@@ -30,17 +36,22 @@ class Consensus:
         if self.pending_block is not None:
             return {"message": "Block already proposed"}
 
-        validator_id = get_current_validator_id()
-        if not validator_id or not is_validator_active(validator_id):
+        validator_id = self.registry.get_current_validator_id()
+        if not validator_id or not self.registry.is_validator_active(validator_id):
             return {"error": "Not a valid or active validator"}, 403
 
-        txs = get_pending_transactions()
+        # Highest fee rate first, bounded by the builder's byte/count limits
+        txs = self.blockchain.get_block_template()
+        # Fees and commissions accrued since the last block, netted per account
+        # pair, minus those of transfers the template left in the pool
+        settlement_txs, settlements = self.blockchain.seal_settlements(txs)
+        txs = txs + settlement_txs
         if not txs:
             return {"message": "No transactions to include in block"}
 
         last_block = self.blockchain.chain[-1]
         new_index = last_block.index + 1
-        timestamp = time.time()
+        timestamp = self.clock()
         previous_hash = last_block.hash
         new_hash = self.calculate_hash(new_index, previous_hash, timestamp, txs, validator_id)
 
@@ -52,6 +63,8 @@ class Consensus:
             'validator': validator_id,
             'hash': new_hash
         }
+        if settlements:
+            new_block['settlements'] = settlements
 
         self.pending_block = new_block
         self.pending_block_votes = {}
@@ -61,7 +74,7 @@ class Consensus:
         return {"message": "Block proposed", "block": new_block}
 
     def vote_on_block(self, validator_address: str, approve: bool):
-        if not is_validator(validator_address):
+        if not self.registry.is_validator(validator_address):
             return {"error": "Not a registered validator"}, 403
 
         if self.pending_block is None:
@@ -75,7 +88,7 @@ class Consensus:
         if self.pending_block is None:
             return {"message": "No pending block"}, 200
 
-        validators = load_validators()
+        validators = self.registry.load_validators()
         total = len(validators)
         if total == 0:
             return {"error": "No validators registered"}, 500
@@ -84,8 +97,11 @@ class Consensus:
         yes_votes = sum(1 for v in votes.values() if v is True)
 
         if yes_votes / total >= self.CONSENSUS_THRESHOLD:
-            add_block(self.pending_block)
-            clear_pending_transactions()
+            if not self.blockchain.add_block(Block.from_dict(self.pending_block)):
+                print(f"[Consensus ❌] Block #{self.pending_block['index']} no longer extends the tip, dropping it")
+                self.reset()
+                return {"error": "Proposed block is stale"}, 409
+            self.blockchain.settlement_ledger.commit(self.pending_block['hash'])
             print(f"[Consensus ✅] Block #{self.pending_block['index']} finalized with {yes_votes}/{total} votes")
             self.reset()
             return {"message": "Block finalized and added"}
@@ -105,11 +121,14 @@ class Consensus:
                 self.check_and_finalize_block()
 
 
-# ✅ Create global consensus object
+def start_auto_consensus(consensus):
+    """Start the background propose/finalize loop for a Consensus instance."""
+    auto_thread = threading.Thread(target=consensus.auto_propose_and_vote_check)
+    auto_thread.daemon = True  # Automatically ends when main program stops
+    auto_thread.start()
+    return auto_thread
+
+
+# ✅ Create global consensus object (the loop is started by the node, not at import)
 blockchain = Blockchain()
 consensus = Consensus(blockchain)
-
-# ✅ Start the background thread
-auto_thread = threading.Thread(target=consensus.auto_propose_and_vote_check)
-auto_thread.daemon = True  # Automatically ends when main program stops
-auto_thread.start()
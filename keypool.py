@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from wallet import WalletUtils
+
+
+def generate_key_pairs(count):
+    """Generate count wallets as (private_key, public_key, address) tuples."""
+    pairs = []
+    for _ in range(count):
+        private_key, public_key = WalletUtils.create_wallet()
+        pairs.append((private_key, public_key, WalletUtils.get_address_from_pubkey(public_key)))
+    return pairs
+
+
+class KeyPairPool:
+    """
+    Bounded pool of pre-generated key pairs.
+
+    A background thread keeps the pool topped up by farming batches of
+    generate_key_pairs() out to worker processes, so /wallet/create only has
+    to pop a ready wallet. When the pool runs dry callers fall back to
+    generating inline.
+    """
+
+    def __init__(self, capacity=1000, batch_size=50, workers=2):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.workers = workers
+        self.pool = queue.Queue(maxsize=capacity)
+        self.executor = None
+        self.thread = None
+        self.running = False
+        self.generated = 0
+        self.served = 0
+        self.misses = 0
+        self.started_at = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.started_at = time.time()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.thread = threading.Thread(target=self._refill_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _refill_loop(self):
+        while self.running:
+            free = self.capacity - self.pool.qsize()
+            if free < self.batch_size:
+                time.sleep(0.05)
+                continue
+
+            batches = min(self.workers, free // self.batch_size)
+            try:
+                futures = [self.executor.submit(generate_key_pairs, self.batch_size) for _ in range(batches)]
+                for future in futures:
+                    for pair in future.result():
+                        try:
+                            self.pool.put_nowait(pair)
+                            self.generated += 1
+                        except queue.Full:
+                            break
+            except Exception as e:
+                if not self.running:
+                    return
+                print(f"[WARN] Key pool refill failed: {str(e)}")
+                time.sleep(1)
+
+    def get(self):
+        """Return (private_key, public_key, address), generating inline on a miss."""
+        try:
+            pair = self.pool.get_nowait()
+        except queue.Empty:
+            self.misses += 1
+            pair = generate_key_pairs(1)[0]
+        self.served += 1
+        return pair
+
+    def get_many(self, count):
+        return [self.get() for _ in range(count)]
+
+    def stats(self):
+        uptime = time.time() - self.started_at if self.started_at else 0
+        return {
+            'depth': self.pool.qsize(),
+            'capacity': self.capacity,
+            'workers': self.workers,
+            'generated': self.generated,
+            'served': self.served,
+            'misses': self.misses,
+            'refill_rate_per_sec': round(self.generated / uptime, 2) if uptime else 0
+        }
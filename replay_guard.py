@@ -0,0 +1,89 @@
+import hashlib
+import json
+import math
+import threading
+import time
+
+
+def payload_hash(payload):
+    """Digest of a signed request payload, independent of key order."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).digest()
+
+
+class _Generation:
+    def __init__(self, size_bits):
+        self.bits = bytearray((size_bits + 7) // 8)
+        self.exact = set()
+
+
+class RotatingBloomFilter:
+    """
+    Time-windowed duplicate filter for ingress payload hashes.
+
+    Two generations are kept; every `window` seconds the older one is
+    discarded, so an entry is remembered for between one and two windows.
+    The Bloom bits answer the common "never seen" case without touching the
+    exact set; a positive is confirmed against the exact digests so a false
+    positive never rejects a fresh transaction. Lookups happen before the
+    signature check, but only payloads that passed it are recorded, so
+    forged or rejected requests neither fill the filter nor block a retry.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001, window=600, clock=time.time):
+        self.size_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.size_bits / capacity * math.log(2)))
+        self.window = window
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.current = _Generation(self.size_bits)
+        self.previous = _Generation(self.size_bits)
+        self.rotated_at = clock()
+        self.rejected = 0
+
+    def _positions(self, digest):
+        # Double hashing over two 64-bit halves of the (already uniform) digest
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return [(h1 + i * h2) % self.size_bits for i in range(self.num_hashes)]
+
+    @staticmethod
+    def _has(generation, positions):
+        return all(generation.bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def _rotate(self):
+        now = self.clock()
+        if now - self.rotated_at >= self.window:
+            # Skipping more than one window means both generations are stale
+            self.previous = self.current if now - self.rotated_at < 2 * self.window else _Generation(self.size_bits)
+            self.current = _Generation(self.size_bits)
+            self.rotated_at = now
+
+    def seen(self, digest):
+        """Return True if digest was recorded in the window."""
+        positions = self._positions(digest)
+        with self.lock:
+            self._rotate()
+            for generation in (self.current, self.previous):
+                if self._has(generation, positions) and digest in generation.exact:
+                    self.rejected += 1
+                    return True
+            return False
+
+    def add(self, digest):
+        """Record digest; call only once the payload has been accepted."""
+        positions = self._positions(digest)
+        with self.lock:
+            self._rotate()
+            for p in positions:
+                self.current.bits[p >> 3] |= 1 << (p & 7)
+            self.current.exact.add(digest)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.current.exact) + len(self.previous.exact),
+                'size_bits': self.size_bits,
+                'num_hashes': self.num_hashes,
+                'window': self.window,
+                'rejected': self.rejected
+            }
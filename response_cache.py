@@ -0,0 +1,71 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized JSON responses.
+
+    Every entry is tagged with the state version it was built from
+    (chain height, validator registry version, ...). A lookup with a newer
+    version drops the stale entry, so nothing has to be flushed by hand when
+    a block finalizes or the validator set changes.
+    """
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # { (endpoint, args): (version, body, etag) }
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_etag(version, body):
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        return f"{version}-{digest}"
+
+    def get(self, endpoint, args, version):
+        """Return (body, etag) if a fresh entry exists, otherwise None."""
+        key = (endpoint, args)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != version:
+                del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, endpoint, args, version, body):
+        """Store a serialized body and return its ETag."""
+        key = (endpoint, args)
+        etag = self.make_etag(version, body)
+        with self.lock:
+            self.entries[key] = (version, body, etag)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, endpoint, args=None):
+        """Drop one entry, or every entry of an endpoint when args is None."""
+        with self.lock:
+            if args is not None:
+                self.entries.pop((endpoint, args), None)
+                return
+            for key in [k for k in self.entries if k[0] == endpoint]:
+                del self.entries[key]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -8,6 +8,7 @@ class RewardSystem:
         self.start_time = int(time.time())
         self.stakers = {}  # { address: { 'amount': x, 'last_claimed': ts, 'total_claimed': y } }
         self.total_staked = 0
+        self.version = 0  # Bumped whenever staker data changes
 
     def get_current_year(self):
         elapsed = int(time.time()) - self.start_time
@@ -28,6 +29,7 @@ class RewardSystem:
         else:
             self.stakers[address]['amount'] += amount
         self.total_staked += amount
+        self.version += 1
 
     def calculate_reward(self, address):
         now = int(time.time())
@@ -53,6 +55,7 @@ class RewardSystem:
         if reward > 0:
             self.stakers[address]['last_claimed'] = int(time.time())
             self.stakers[address]['total_claimed'] += reward
+            self.version += 1
         return reward
 
     def get_stake_info(self, address):
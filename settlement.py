@@ -0,0 +1,193 @@
+import threading
+from collections import OrderedDict
+
+from utils import hash_data
+
+SETTLEMENT_TX_TYPE = "settlement"
+
+
+def transfer_ref(sender, nonce):
+    """Reference tying an accrual to the transfer that caused it."""
+    return f"{sender}:{nonce}"
+
+
+class SettlementLedger:
+    """
+    In-memory ledger of fees and referral commissions owed during a block interval.
+
+    /transfer accrues fee and commission obligations here instead of writing
+    a chain transaction for each. When a block is proposed the ledger is
+    sealed: obligations are netted per (payer, payee, asset) pair, with
+    opposite flows between the same two accounts cancelling out, and turned
+    into one settlement transaction per pair plus a breakdown by kind and
+    source transfer for the block. Accruals of transfers that are still
+    waiting in the pool stay behind, so a fee is only settled in the block
+    that carries (or follows) its transfer. The sealed batch is committed
+    when the block finalizes or returned to the ledger if the proposal is
+    dropped. The ledger remembers which accruals recent blocks settled, so a
+    reorg that disconnects one of them owes its accruals again.
+    """
+
+    def __init__(self, max_history=100):
+        self.lock = threading.Lock()
+        self.max_history = max_history
+        self.committed = OrderedDict()  # { block_hash: [accrual, ...] } settled by recent blocks
+        self.reverted = OrderedDict()  # { block_hash: [accrual, ...] } owed again after a reorg
+        self.accruals = []  # [(payer, payee, asset, amount, kind, ref)]
+        self.sealed = None
+        self.batch = 0
+        self.settled_totals = {}  # { (payee, kind): amount }
+        self.owed_totals = {}  # { (payer, asset): unsettled amount }
+        self.ref_charges = {}  # { ref: { asset: unsettled amount } }
+
+    def accrue(self, payer, payee, asset, amount, kind, ref=None):
+        if amount <= 0:
+            return
+        with self.lock:
+            self._owe((payer, payee, asset, amount, kind, ref))
+
+    def _owe(self, accrual):
+        payer, payee, asset, amount, kind, ref = accrual
+        self.accruals.append(accrual)
+        key = (payer, asset)
+        self.owed_totals[key] = self.owed_totals.get(key, 0) + amount
+        if ref is not None:
+            charges = self.ref_charges.setdefault(ref, {})
+            charges[asset] = charges.get(asset, 0) + amount
+
+    def _settle(self, accruals):
+        for payer, payee, asset, amount, kind, ref in accruals:
+            key = (payee, kind)
+            self.settled_totals[key] = self.settled_totals.get(key, 0) + amount
+            owed = self.owed_totals.pop((payer, asset), 0) - amount
+            if owed > 1e-12:
+                self.owed_totals[(payer, asset)] = owed
+            self.ref_charges.pop(ref, None)
+
+    def _remember(self, store, block_hash, accruals):
+        store[block_hash] = accruals
+        while len(store) > self.max_history:
+            store.popitem(last=False)
+
+    def owed(self, payer, asset):
+        """Outstanding (unsettled) obligations of payer in asset, sealed or not."""
+        with self.lock:
+            return self.owed_totals.get((payer, asset), 0)
+
+    def charges(self, ref):
+        """Unsettled amounts per asset that the transfer behind ref owes."""
+        with self.lock:
+            return dict(self.ref_charges.get(ref, {}))
+
+    def pending_total(self, payee, kind):
+        with self.lock:
+            entries = self.accruals + (self.sealed or [])
+            return sum(e[3] for e in entries if e[1] == payee and e[4] == kind)
+
+    def settled_total(self, payee, kind):
+        with self.lock:
+            return self.settled_totals.get((payee, kind), 0)
+
+    def seal(self, exclude=()):
+        """
+        Net the current accruals into settlement transactions, leaving out
+        those whose ref is in exclude. Returns (transactions, breakdown); both
+        empty when nothing is owed or a previous batch is still waiting for
+        its block.
+        """
+        with self.lock:
+            if self.sealed is not None:
+                return [], []
+            sealed = [a for a in self.accruals if a[5] not in exclude]
+            if not sealed:
+                return [], []
+            self.sealed = sealed
+            self.accruals = [a for a in self.accruals if a[5] in exclude]
+            self.batch += 1
+
+            pairs = {}
+            for payer, payee, asset, amount, kind, ref in self.sealed:
+                a, b = sorted((payer, payee))
+                entry = pairs.setdefault((a, b, asset), {'net': 0, 'gross': {}})
+                entry['net'] += amount if payer == a else -amount
+                gross = entry['gross'].setdefault((payer, payee, kind), {'amount': 0, 'refs': []})
+                gross['amount'] += amount
+                if ref is not None:
+                    gross['refs'].append(ref)
+
+            transactions, breakdown = [], []
+            for (a, b, asset), entry in sorted(pairs.items()):
+                net = entry['net']
+                payer, payee = (a, b) if net >= 0 else (b, a)
+                settlement = None
+                if net != 0:
+                    settlement = {
+                        'type': SETTLEMENT_TX_TYPE,
+                        'sender': payer,
+                        'receiver': payee,
+                        'amount': abs(net),
+                        'asset': asset
+                    }
+                    # Not a 'txid': settlements never pass through the mempool
+                    settlement['settlement_id'] = hash_data({'batch': self.batch, **settlement})
+                    transactions.append(settlement)
+                breakdown.append({
+                    'asset': asset,
+                    'settlement_id': settlement['settlement_id'] if settlement else None,
+                    'items': [
+                        {'payer': p, 'payee': q, 'kind': k, 'amount': g['amount'], 'refs': g['refs']}
+                        for (p, q, k), g in sorted(entry['gross'].items())
+                    ]
+                })
+            return transactions, breakdown
+
+    def commit(self, block_hash=None):
+        """The sealed batch made it into a finalized block."""
+        with self.lock:
+            if self.sealed:
+                self._settle(self.sealed)
+                if block_hash is not None:
+                    self._remember(self.committed, block_hash, self.sealed)
+            self.sealed = None
+
+    def unsettle(self, block_hash):
+        """A reorg disconnected the block that settled these accruals; owe them again."""
+        with self.lock:
+            accruals = self.committed.pop(block_hash, None)
+            if not accruals:
+                return
+            for accrual in accruals:
+                payer, payee, asset, amount, kind, ref = accrual
+                settled = self.settled_totals.pop((payee, kind), 0) - amount
+                if settled > 1e-12:
+                    self.settled_totals[(payee, kind)] = settled
+                self._owe(accrual)
+            self._remember(self.reverted, block_hash, accruals)
+
+    def resettle(self, block_hash):
+        """A disconnected block is back on the main chain; its accruals are settled again."""
+        with self.lock:
+            accruals = self.reverted.pop(block_hash, None)
+            if not accruals:
+                return
+            # Accruals already re-sealed into a newer proposal are left to that batch
+            owed = [a for a in accruals if a in self.accruals]
+            for accrual in owed:
+                self.accruals.remove(accrual)
+            self._settle(owed)
+            self._remember(self.committed, block_hash, accruals)
+
+    def rollback(self):
+        """The block carrying the sealed batch was dropped; owe it again."""
+        with self.lock:
+            if self.sealed:
+                self.accruals = self.sealed + self.accruals
+            self.sealed = None
+
+    def stats(self):
+        with self.lock:
+            return {
+                'pending_accruals': len(self.accruals),
+                'sealed_accruals': len(self.sealed or []),
+                'batches': self.batch
+            }
@@ -0,0 +1,335 @@
+# simulator.py
+
+"""
+Deterministic in-process cluster simulator for consensus benchmarking.
+
+Runs N nodes (Blockchain + Consensus + in-memory validator registry) in one
+process against a virtual clock. Messages travel over a simulated network
+with per-link latency, jitter, loss and timed partitions, and a load
+generator submits signed transactions. The same seed gives the same run.
+
+    python simulator.py --nodes 16 --duration 120 --tx-rate 50
+"""
+
+import argparse
+import contextlib
+import heapq
+import io
+import json
+import random
+
+from blockchain import Blockchain, Block
+from consensus import Consensus
+from utils import generate_txid
+from wallet import Wallet, verify_signature
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class InMemoryRegistry:
+    """Validator registry with the same interface as the validator module."""
+
+    def __init__(self, validators):
+        self.validators = validators
+
+    def load_validators(self):
+        return list(self.validators)
+
+    def is_validator(self, address):
+        return any(v["address"] == address for v in self.validators)
+
+    def get_current_validator_id(self):
+        if not self.validators:
+            return None
+        return sorted(self.validators, key=lambda v: v["stake"], reverse=True)[0]["address"]
+
+    def get_validator_stake(self, address):
+        for v in self.validators:
+            if v["address"] == address:
+                return v["stake"]
+        return 0
+
+    def is_validator_active(self, address):
+        for v in self.validators:
+            if v["address"] == address:
+                return v.get("active", True)
+        return False
+
+
+class SimNetwork:
+    """Delivers messages between nodes with latency, jitter, loss and partitions."""
+
+    def __init__(self, sim, latency=0.05, jitter=0.02, loss=0.0):
+        self.sim = sim
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.links = {}  # { (src, dst): (latency, jitter, loss) }
+        self.partitions = []  # [(start, end, [set(node), ...])]
+        self.sent = {}
+        self.dropped = 0
+        self.bytes_sent = 0
+
+    def set_link(self, src, dst, latency=None, jitter=None, loss=None):
+        self.links[(src, dst)] = (
+            self.latency if latency is None else latency,
+            self.jitter if jitter is None else jitter,
+            self.loss if loss is None else loss
+        )
+
+    def add_partition(self, groups, start, end):
+        self.partitions.append((start, end, [set(g) for g in groups]))
+
+    def _partitioned(self, src, dst):
+        now = self.sim.clock.now
+        for start, end, groups in self.partitions:
+            if start <= now < end and not any(src in g and dst in g for g in groups):
+                return True
+        return False
+
+    def send(self, src, dst, kind, payload):
+        self.sent[kind] = self.sent.get(kind, 0) + 1
+        self.bytes_sent += len(json.dumps(payload, default=str))
+
+        latency, jitter, loss = self.links.get((src, dst), (self.latency, self.jitter, self.loss))
+        if self._partitioned(src, dst) or self.sim.rng.random() < loss:
+            self.dropped += 1
+            return
+        delay = max(0.0, latency + self.sim.rng.uniform(-jitter, jitter))
+        self.sim.schedule(delay, self.sim.nodes[dst].receive, src, kind, payload)
+
+    def broadcast(self, src, kind, payload):
+        for dst in self.sim.nodes:
+            if dst != src:
+                self.send(src, dst, kind, payload)
+
+
+class SimNode:
+    def __init__(self, sim, address, registry, keep_blocks=None):
+        self.sim = sim
+        self.address = address
+        if keep_blocks:
+            self.blockchain = Blockchain(mode="pruned", keep_blocks=keep_blocks,
+                                         stake_of=registry.get_validator_stake)
+        else:
+            self.blockchain = Blockchain(stake_of=registry.get_validator_stake)
+        self.consensus = Consensus(self.blockchain, registry=registry, clock=sim.clock)
+
+    @property
+    def is_leader(self):
+        return self.consensus.registry.get_current_validator_id() == self.address
+
+    def submit_tx(self, data):
+        """Same checks as /submit_tx, then gossip the pending tx to peers."""
+        message = f"{data['sender']}-{data['receiver']}-{data['amount']}-{data['nonce']}"
+        if self.sim.verify_signatures and not verify_signature(data["public_key"], message, data["signature"]):
+            return None
+        if not self.blockchain.reserve_nonce(data["sender"], data["nonce"]):
+            return None
+        tx = {
+            "sender": data["sender"],
+            "receiver": data["receiver"],
+            "amount": data["amount"],
+            "nonce": data["nonce"],
+            "timestamp": self.sim.clock.now,
+        }
+        tx["txid"] = generate_txid(tx)
+        self.blockchain.add_pending_transaction(tx)
+        self.sim.network.broadcast(self.address, "tx", tx)
+        return tx["txid"]
+
+    def tick(self):
+        """Leader-only: propose when idle, give up on a proposal that timed out."""
+        pending = self.consensus.pending_block
+        if pending is not None and self.sim.clock.now - pending['timestamp'] > self.sim.view_timeout:
+            self.consensus.reset()
+            pending = None
+        if pending is None:
+            result = self.consensus.propose_block()
+            block = result.get("block") if isinstance(result, dict) else None
+            if block:
+                self.sim.network.broadcast(self.address, "proposal", block)
+                self.on_vote(self.address, True)
+
+    def receive(self, src, kind, payload):
+        getattr(self, f"on_{kind}")(src, payload)
+
+    def on_tx(self, src, tx):
+        self.blockchain.add_pending_transaction(tx)
+
+    def on_proposal(self, src, block):
+        last_block = self.blockchain.get_last_block()
+        approve = block['previous_hash'] == last_block.hash
+        self.consensus.pending_block = block
+        self.sim.network.send(self.address, src, "vote", approve)
+
+    def on_vote(self, voter, approve):
+        if self.consensus.pending_block is None:
+            return
+        self.consensus.vote_on_block(voter, approve)
+        block = self.consensus.pending_block
+        result = self.consensus.check_and_finalize_block()
+        if result == {"message": "Block finalized and added"}:
+            self.sim.record_finalized(block)
+            self.sim.network.broadcast(self.address, "commit", block)
+
+    def on_commit(self, src, block):
+        self.consensus.reset()
+        last_block = self.blockchain.get_last_block()
+        if block['index'] <= last_block.index:
+            return
+        if block['index'] > last_block.index + 1:
+            self.sim.network.send(self.address, src, "sync_request", last_block.index + 1)
+            return
+        self.blockchain.add_block(Block.from_dict(block))
+
+    def on_sync_request(self, src, from_index):
+        blocks = [self.blockchain.chain[i].to_dict() for i in range(from_index, len(self.blockchain.chain))]
+        self.sim.network.send(self.address, src, "sync_response", blocks)
+
+    def on_sync_response(self, src, blocks):
+        for block in blocks:
+            if block['index'] == self.blockchain.get_last_block().index + 1:
+                self.blockchain.add_block(Block.from_dict(block))
+
+
+class ClusterSimulator:
+    def __init__(self, nodes=4, seed=1, block_interval=1.0, view_timeout=5.0,
+                 latency=0.05, jitter=0.02, loss=0.0, clients=20,
+                 verify_signatures=True, keep_blocks=None):
+        self.rng = random.Random(seed)
+        self.clock = VirtualClock()
+        self.events = []
+        self.seq = 0
+        self.block_interval = block_interval
+        self.view_timeout = view_timeout
+        self.verify_signatures = verify_signatures
+
+        addresses = [f"node-{i:03d}" for i in range(nodes)]
+        # Stakes decide the leader exactly as get_current_validator_id does
+        validators = [
+            {"address": a, "stake": 10_000 + nodes - i, "api_url": f"sim://{a}", "active": True}
+            for i, a in enumerate(addresses)
+        ]
+        self.nodes = {}
+        for a in addresses:
+            self.nodes[a] = SimNode(self, a, InMemoryRegistry(validators), keep_blocks)
+        self.network = SimNetwork(self, latency, jitter, loss)
+
+        # Deterministic client keys, funded on every node
+        self.clients = [Wallet(f"{self.rng.getrandbits(255) + 1:064x}") for _ in range(clients)]
+        for node in self.nodes.values():
+            for wallet in self.clients:
+                node.blockchain.balances[wallet.get_public_key()] = 10 ** 12
+
+        self.nonces = {}  # { client public key: last nonce used }
+        self.submitted = {}  # { txid: submit time }
+        self.finality = []
+        self.blocks_finalized = 0
+
+    def schedule(self, delay, callback, *args):
+        self.seq += 1
+        heapq.heappush(self.events, (self.clock.now + delay, self.seq, callback, args))
+
+    def record_finalized(self, block):
+        self.blocks_finalized += 1
+        for tx in block['transactions']:
+            submitted_at = self.submitted.pop(tx.get('txid'), None)
+            if submitted_at is not None:
+                self.finality.append(self.clock.now - submitted_at)
+
+    def _leader_tick(self):
+        for node in self.nodes.values():
+            if node.is_leader:
+                node.tick()
+        self.schedule(self.block_interval, self._leader_tick)
+
+    def _submit_random_tx(self, interval):
+        wallet = self.rng.choice(self.clients)
+        receiver = self.rng.choice(self.clients).get_public_key()
+        sender = wallet.get_public_key()
+        amount = self.rng.randint(1, 100)
+        nonce = self.nonces[sender] = self.nonces.get(sender, 0) + 1
+        data = {
+            "sender": sender,
+            "receiver": receiver,
+            "amount": amount,
+            "nonce": nonce,
+            "public_key": sender,
+            # RFC 6979 signatures keep runs with the same seed byte-identical
+            "signature": wallet.sk.sign_deterministic(f"{sender}-{receiver}-{amount}-{nonce}".encode()).hex()
+        }
+        node = self.nodes[self.rng.choice(list(self.nodes))]
+        txid = node.submit_tx(data)
+        if txid:
+            self.submitted[txid] = self.clock.now
+        self.schedule(self.rng.expovariate(1.0 / interval), self._submit_random_tx, interval)
+
+    def run(self, duration=60.0, tx_rate=20.0, verbose=False):
+        """Run for duration virtual seconds and return the report."""
+        self.schedule(self.block_interval, self._leader_tick)
+        if tx_rate > 0:
+            self.schedule(0.0, self._submit_random_tx, 1.0 / tx_rate)
+
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            while self.events and self.events[0][0] <= duration:
+                when, _, callback, args = heapq.heappop(self.events)
+                self.clock.now = when
+                callback(*args)
+        self.clock.now = duration
+        return self.report(duration)
+
+    @staticmethod
+    def _percentile(values, pct):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def report(self, duration):
+        heights = [len(node.blockchain.chain) - 1 for node in self.nodes.values()]
+        return {
+            'nodes': len(self.nodes),
+            'duration': duration,
+            'blocks_finalized': self.blocks_finalized,
+            'txs_finalized': len(self.finality),
+            'txs_pending': len(self.submitted),
+            'finalized_tx_per_sec': round(len(self.finality) / duration, 2) if duration else 0,
+            'finality_p50': self._percentile(self.finality, 50),
+            'finality_p90': self._percentile(self.finality, 90),
+            'finality_p99': self._percentile(self.finality, 99),
+            'min_height': min(heights),
+            'max_height': max(heights),
+            'messages': dict(self.network.sent),
+            'messages_dropped': self.network.dropped,
+            'bytes_sent': self.network.bytes_sent
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate a Zinc validator cluster in one process")
+    parser.add_argument("--nodes", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--tx-rate", type=float, default=20.0)
+    parser.add_argument("--block-interval", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-verify", action="store_true", help="Skip ECDSA checks on ingress")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    sim = ClusterSimulator(
+        nodes=args.nodes, seed=args.seed, block_interval=args.block_interval,
+        latency=args.latency, jitter=args.jitter, loss=args.loss,
+        verify_signatures=not args.no_verify
+    )
+    print(json.dumps(sim.run(args.duration, args.tx_rate, args.verbose), indent=4))
@@ -3,6 +3,7 @@ import threading
 
 VALIDATOR_FILE = "validators.json"
 file_lock = threading.Lock()
+registry_version = 0  # Bumped on every save so readers can tag cached views
 
 def load_validators():
     """Load validators from JSON file safely."""
@@ -15,9 +16,15 @@ def load_validators():
 
 def save_validators(validators):
     """Save validators to JSON file safely."""
+    global registry_version
     with file_lock:
         with open(VALIDATOR_FILE, "w") as f:
             json.dump(validators, f, indent=4)
+        registry_version += 1
+
+def get_registry_version():
+    """Return a counter that changes whenever the validator set is saved."""
+    return registry_version
 
 def is_validator(address):
     """Check if given address is registered as a validator."""
@@ -59,6 +66,13 @@ def remove_validator(address):
     save_validators(updated)
     return True
 
+def get_validator_stake(address):
+    """Return the registered stake of a validator, or 0 if it is not registered."""
+    for v in load_validators():
+        if v["address"] == address:
+            return v["stake"]
+    return 0
+
 def get_current_validator_id():
     """Return the address of validator with highest stake, or None if no validators."""
     validators = load_validators()